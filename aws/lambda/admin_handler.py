@@ -322,8 +322,11 @@ def handle_create_quote(event, user_claims):
         
         quote_item = {
             'id': quote_id,
+            'type': 'quote',
             'quote': body['quote'].strip(),
             'author': body['author'].strip(),
+            'quote_normalized': body['quote'].strip().lower(),
+            'author_normalized': body['author'].strip().lower(),
             'tags': body.get('tags', []),
             'created_at': timestamp,
             'updated_at': timestamp,
@@ -383,8 +386,11 @@ def handle_update_quote(event, user_claims):
         
         updated_item = {
             'id': quote_id,
+            'type': 'quote',
             'quote': body['quote'].strip(),
             'author': body['author'].strip(),
+            'quote_normalized': body['quote'].strip().lower(),
+            'author_normalized': body['author'].strip().lower(),
             'tags': body.get('tags', []),
             'updated_at': timestamp,
             'updated_by': user_claims['username']
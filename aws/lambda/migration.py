@@ -209,7 +209,7 @@ def prepare_quote_for_migration(old_quote):
             'quote': old_quote.get('quote', ''),
             'author': author,
             'author_normalized': author.lower(),
-            'quote_normalized': old_quote.get('quote', '')[:100].lower(),  # First 100 chars for search
+            'quote_normalized': old_quote.get('quote', '').lower(),  # Full text for case-insensitive search
             'tags': old_quote.get('tags', []),
             'created_at': created_at,
             'updated_at': updated_at,
@@ -1,53 +1,130 @@
+import hashlib
 import json
 import os
-import boto3
+import re
+import time
 import logging
+from collections import OrderedDict
 import requests
-from typing import List, Dict, Any
+from requests.adapters import HTTPAdapter
+from typing import List, Dict, Any, Optional
+
+try:
+    import orjson
+except ImportError:
+    # Fallback to the stdlib json module if orjson is not available
+    orjson = None
 
 # Configure logging
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# CORS headers
+CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,X-Api-Key,Authorization',
+    'Access-Control-Allow-Methods': 'OPTIONS,POST'
+}
+
+# Read once per container; the environment does not change between invocations
+OPENAI_API_KEY = os.environ.get('OPENAI_API_KEY')
+
+# Module-level session so warm invocations reuse the keep-alive TLS connection
+# to api.openai.com instead of handshaking on every request
+SESSION = requests.Session()
+SESSION.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
+# Near-duplicate cache for this warm container: re-edits that only change case,
+# whitespace or punctuation reuse the earlier selection instead of calling OpenAI.
+# Keys are namespaced by the available tag list, so a changed list never hits
+TAG_CACHE_TTL = 7 * 24 * 3600
+TAG_CACHE_MAX_ENTRIES = 1024
+_tag_cache = OrderedDict()
+
+# Patterns compiled once per container
+WORD_PATTERN = re.compile(r'\w+')
+MARKDOWN_FENCE_PATTERN = re.compile(r'```(?:json)?')
+JSON_ARRAY_PATTERN = re.compile(r'\[(.*?)\]', re.DOTALL)
+JSON_OBJECT_PATTERN = re.compile(r'\{.*\}', re.DOTALL)
+NUMBERED_ARRAY_PATTERN = re.compile(r'"?(\d+)"?\s*[:.]\s*(\[.*?\])', re.DOTALL)
+QUOTED_STRING_PATTERN = re.compile(r'"([^"]+)"')
+
+# Batched requests: quotes per OpenAI call, and the most one invocation accepts
+TAG_BATCH_SIZE = 10
+MAX_BATCH_QUOTES = 50
+
+# Proactive throttling sized to the account's OpenAI limits. Each container
+# refills its own request and token buckets continuously and waits for capacity
+# instead of firing a request that would come back 429
+OPENAI_RPM_LIMIT = int(os.environ.get('OPENAI_RPM_LIMIT', '500'))
+OPENAI_TPM_LIMIT = int(os.environ.get('OPENAI_TPM_LIMIT', '200000'))
+MAX_THROTTLE_WAIT_SECONDS = 5.0
+_openai_capacity = {
+    'requests': float(OPENAI_RPM_LIMIT),
+    'tokens': float(OPENAI_TPM_LIMIT),
+    'updated': time.monotonic()
+}
+
+SYSTEM_PROMPT = 'You are a thoughtful tag selector. You analyze quotes deeply to understand their core meaning, then select the most relevant tags from a provided list. You ONLY choose from existing tags and NEVER create new ones. Always return a JSON array of 3-5 selected tags.'
+BATCH_SYSTEM_PROMPT = 'You are a thoughtful tag selector. You analyze quotes deeply to understand their core meaning, then select the most relevant tags from a provided list. You ONLY choose from existing tags and NEVER create new ones. Always return a JSON object mapping each quote number to a JSON array of 3-5 selected tags.'
+
 def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Lambda function to proxy OpenAI requests for tag generation.
     This keeps the OpenAI API key secure on the server side.
     """
-    logger.info(f"Received event: {json.dumps(event)}")
+    logger.info(f"Received event: {dumps_json(event)}")
     
-    # Parse the request body
+    # Parse the request body; a 'quotes' list selects tags for several quotes at once
     try:
-        body = json.loads(event['body'])
-        quote = body['quote']
-        author = body['author']
+        body = loads_json(event['body'])
+        if 'quotes' in body:
+            quotes = [(item['quote'], item['author']) for item in body['quotes']]
+        else:
+            quote = body['quote']
+            author = body['author']
         existing_tags = body.get('existingTags', [])
-    except (json.JSONDecodeError, KeyError) as e:
+    except (json.JSONDecodeError, KeyError, TypeError) as e:
         logger.error(f"Invalid request body: {e}")
         return {
             'statusCode': 400,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Api-Key,Authorization',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            },
-            'body': json.dumps({'error': 'Invalid request. Must include quote, author, and optionally existingTags.'})
+            'headers': CORS_HEADERS,
+            'body': dumps_json({'error': 'Invalid request. Must include quote, author (or a quotes list of them), and optionally existingTags.'})
+        }
+    
+    if 'quotes' in body and not 0 < len(quotes) <= MAX_BATCH_QUOTES:
+        return {
+            'statusCode': 400,
+            'headers': CORS_HEADERS,
+            'body': dumps_json({'error': f'quotes must contain between 1 and {MAX_BATCH_QUOTES} items.'})
         }
     
     # Get OpenAI API key from environment
-    openai_api_key = os.environ.get('OPENAI_API_KEY')
+    openai_api_key = OPENAI_API_KEY
     if not openai_api_key:
         logger.error("OpenAI API key not configured")
         return {
             'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Api-Key,Authorization',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            },
-            'body': json.dumps({'error': 'OpenAI service not configured'})
+            'headers': CORS_HEADERS,
+            'body': dumps_json({'error': 'OpenAI service not configured'})
+        }
+    
+    if 'quotes' in body:
+        return select_tags_for_batch(quotes, existing_tags)
+    
+    cache_key = tag_cache_key(quote, author, existing_tags)
+    cached_tags = get_cached_tags(cache_key)
+    if cached_tags is not None:
+        logger.info(f"Returning cached tags for quote: {cached_tags}")
+        return {
+            'statusCode': 200,
+            'headers': CORS_HEADERS,
+            'body': dumps_json({
+                'tags': cached_tags,
+                'usage': {},
+                'cached': True
+            })
         }
     
     # Build the prompt for tag generation
@@ -55,103 +132,254 @@ def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     
     try:
         # Call OpenAI API
-        response = requests.post(
-            'https://api.openai.com/v1/chat/completions',
-            headers={
-                'Content-Type': 'application/json',
-                'Authorization': f'Bearer {openai_api_key}'
-            },
-            json={
-                'model': 'gpt-4o-mini',
-                'messages': [
-                    {
-                        'role': 'system',
-                        'content': 'You are a thoughtful tag selector. You analyze quotes deeply to understand their core meaning, then select the most relevant tags from a provided list. You ONLY choose from existing tags and NEVER create new ones. Always return a JSON array of 3-5 selected tags.'
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }
-                ],
-                'max_tokens': 100,
-                'temperature': 0.2
-            },
-            timeout=30
-        )
+        response = request_tag_selection(SYSTEM_PROMPT, prompt, max_tokens=100)
+        if response is None:
+            return throttled_response()
         
         if response.status_code == 200:
-            openai_data = response.json()
+            openai_data = loads_json(response.content)
             content = openai_data['choices'][0]['message']['content']
             
             # Parse the tags from the response
             tags = parse_tags_from_response(content)
+            if tags:
+                put_cached_tags(cache_key, tags)
             
             logger.info(f"Successfully generated tags for quote: {tags}")
             
             return {
                 'statusCode': 200,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Api-Key,Authorization',
-                    'Access-Control-Allow-Methods': 'OPTIONS,POST'
-                },
-                'body': json.dumps({
+                'headers': CORS_HEADERS,
+                'body': dumps_json({
                     'tags': tags,
                     'usage': openai_data.get('usage', {})
                 })
             }
-        elif response.status_code == 429:
-            # Rate limit hit
-            logger.warning("OpenAI rate limit hit")
-            return {
-                'statusCode': 429,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Api-Key,Authorization',
-                    'Access-Control-Allow-Methods': 'OPTIONS,POST'
-                },
-                'body': json.dumps({'error': 'Rate limit exceeded. Please wait a moment and try again.'})
-            }
         else:
-            logger.error(f"OpenAI API error: {response.status_code} - {response.text}")
-            return {
-                'statusCode': response.status_code,
-                'headers': {
-                    'Content-Type': 'application/json',
-                    'Access-Control-Allow-Origin': '*',
-                    'Access-Control-Allow-Headers': 'Content-Type,X-Api-Key,Authorization',
-                    'Access-Control-Allow-Methods': 'OPTIONS,POST'
-                },
-                'body': json.dumps({'error': f'OpenAI API error: {response.status_code}'})
-            }
+            return openai_error_response(response)
             
     except requests.exceptions.Timeout:
         logger.error("OpenAI API timeout")
         return {
             'statusCode': 504,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Api-Key,Authorization',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            },
-            'body': json.dumps({'error': 'Request timeout'})
+            'headers': CORS_HEADERS,
+            'body': dumps_json({'error': 'Request timeout'})
         }
     except Exception as e:
         logger.error(f"Unexpected error: {e}")
         return {
             'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Headers': 'Content-Type,X-Api-Key,Authorization',
-                'Access-Control-Allow-Methods': 'OPTIONS,POST'
-            },
-            'body': json.dumps({'error': 'Internal server error'})
+            'headers': CORS_HEADERS,
+            'body': dumps_json({'error': 'Internal server error'})
         }
 
+def select_tags_for_batch(quotes: List[tuple], existing_tags: List[str]) -> Dict[str, Any]:
+    """Select tags for several quotes, sending up to TAG_BATCH_SIZE uncached quotes per OpenAI call."""
+    results = []
+    pending = []
+    for index, (quote, author) in enumerate(quotes):
+        cache_key = tag_cache_key(quote, author, existing_tags)
+        cached_tags = get_cached_tags(cache_key)
+        results.append({'tags': cached_tags or [], 'cached': cached_tags is not None})
+        if cached_tags is None:
+            pending.append((index, quote, author, cache_key))
+    
+    usage = {}
+    try:
+        for start in range(0, len(pending), TAG_BATCH_SIZE):
+            chunk = pending[start:start + TAG_BATCH_SIZE]
+            prompt = build_batch_tag_generation_prompt(
+                [(quote, author) for _, quote, author, _ in chunk], existing_tags
+            )
+            response = request_tag_selection(BATCH_SYSTEM_PROMPT, prompt, max_tokens=60 * len(chunk) + 20)
+            if response is None:
+                return throttled_response()
+            if response.status_code != 200:
+                return openai_error_response(response)
+            
+            openai_data = loads_json(response.content)
+            content = openai_data['choices'][0]['message']['content']
+            batch_tags = parse_batch_tags_from_response(content, len(chunk))
+            
+            for (index, _, _, cache_key), tags in zip(chunk, batch_tags):
+                results[index]['tags'] = tags
+                if tags:
+                    put_cached_tags(cache_key, tags)
+            
+            for key, value in openai_data.get('usage', {}).items():
+                if isinstance(value, int):
+                    usage[key] = usage.get(key, 0) + value
+        
+        logger.info(f"Successfully generated tags for {len(quotes)} quotes ({len(pending)} uncached)")
+        
+        return {
+            'statusCode': 200,
+            'headers': CORS_HEADERS,
+            'body': dumps_json({
+                'results': results,
+                'usage': usage
+            })
+        }
+            
+    except requests.exceptions.Timeout:
+        logger.error("OpenAI API timeout")
+        return {
+            'statusCode': 504,
+            'headers': CORS_HEADERS,
+            'body': dumps_json({'error': 'Request timeout'})
+        }
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}")
+        return {
+            'statusCode': 500,
+            'headers': CORS_HEADERS,
+            'body': dumps_json({'error': 'Internal server error'})
+        }
+
+def acquire_openai_capacity(estimated_tokens: int) -> bool:
+    """
+    Take one request and the estimated tokens from this container's buckets,
+    sleeping until they refill. Returns False without waiting when that would
+    take longer than MAX_THROTTLE_WAIT_SECONDS.
+    """
+    now = time.monotonic()
+    elapsed = now - _openai_capacity['updated']
+    _openai_capacity['updated'] = now
+    _openai_capacity['requests'] = min(
+        OPENAI_RPM_LIMIT, _openai_capacity['requests'] + elapsed * OPENAI_RPM_LIMIT / 60
+    )
+    _openai_capacity['tokens'] = min(
+        OPENAI_TPM_LIMIT, _openai_capacity['tokens'] + elapsed * OPENAI_TPM_LIMIT / 60
+    )
+    
+    # Never ask for more tokens than a full bucket holds
+    estimated_tokens = min(estimated_tokens, OPENAI_TPM_LIMIT)
+    wait_seconds = max(
+        (1 - _openai_capacity['requests']) * 60 / OPENAI_RPM_LIMIT,
+        (estimated_tokens - _openai_capacity['tokens']) * 60 / OPENAI_TPM_LIMIT,
+        0
+    )
+    if wait_seconds > MAX_THROTTLE_WAIT_SECONDS:
+        return False
+    
+    if wait_seconds:
+        logger.info(f"Throttling OpenAI request for {wait_seconds:.2f}s")
+        time.sleep(wait_seconds)
+        _openai_capacity['updated'] = time.monotonic()
+        _openai_capacity['requests'] = max(_openai_capacity['requests'], 1.0)
+        _openai_capacity['tokens'] = max(_openai_capacity['tokens'], float(estimated_tokens))
+    
+    _openai_capacity['requests'] -= 1
+    _openai_capacity['tokens'] -= estimated_tokens
+    return True
+
+def throttled_response() -> Dict[str, Any]:
+    """429 returned when local throttling declines to send a request."""
+    logger.warning("OpenAI request throttled locally")
+    return {
+        'statusCode': 429,
+        'headers': CORS_HEADERS,
+        'body': dumps_json({'error': 'Rate limit exceeded. Please wait a moment and try again.'})
+    }
+
+def request_tag_selection(system_prompt: str, prompt: str, max_tokens: int) -> Optional[requests.Response]:
+    """
+    Send one chat completion request for tag selection. Returns None when the
+    request was throttled locally and never sent.
+    """
+    # Roughly four characters per token, plus the completion budget
+    estimated_tokens = (len(system_prompt) + len(prompt)) // 4 + max_tokens
+    if not acquire_openai_capacity(estimated_tokens):
+        return None
+    
+    return SESSION.post(
+        'https://api.openai.com/v1/chat/completions',
+        headers={
+            'Content-Type': 'application/json',
+            'Authorization': f'Bearer {OPENAI_API_KEY}'
+        },
+        json={
+            'model': 'gpt-4o-mini',
+            'messages': [
+                {
+                    'role': 'system',
+                    'content': system_prompt
+                },
+                {
+                    'role': 'user',
+                    'content': prompt
+                }
+            ],
+            'max_tokens': max_tokens,
+            'temperature': 0.2
+        },
+        timeout=30
+    )
+
+def openai_error_response(response: requests.Response) -> Dict[str, Any]:
+    """Map a non-200 OpenAI response to this API's error response."""
+    if response.status_code == 429:
+        # Rate limit hit
+        logger.warning("OpenAI rate limit hit")
+        return {
+            'statusCode': 429,
+            'headers': CORS_HEADERS,
+            'body': dumps_json({'error': 'Rate limit exceeded. Please wait a moment and try again.'})
+        }
+    
+    logger.error(f"OpenAI API error: {response.status_code} - {response.text}")
+    return {
+        'statusCode': response.status_code,
+        'headers': CORS_HEADERS,
+        'body': dumps_json({'error': f'OpenAI API error: {response.status_code}'})
+    }
+
+def dumps_json(obj: Any) -> str:
+    """Serialize to a JSON string, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
+
+def loads_json(data: Any) -> Any:
+    """Parse JSON text or bytes; orjson's decode error subclasses json.JSONDecodeError."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def normalize_text(text: str) -> str:
+    """Reduce text to lowercase words so case, spacing and punctuation edits compare equal."""
+    return ' '.join(WORD_PATTERN.findall(text.casefold()))
+
+def tag_cache_key(quote: str, author: str, existing_tags: List[str]) -> str:
+    """Cache key for a quote and author, namespaced by the available tags."""
+    key_source = '\x1f'.join([
+        normalize_text(quote),
+        normalize_text(author),
+        '\x1e'.join(sorted(existing_tags))
+    ])
+    return hashlib.blake2b(key_source.encode('utf-8'), digest_size=16).hexdigest()
+
+def get_cached_tags(cache_key: str):
+    """Return cached tags for the key, or None when missing or expired."""
+    entry = _tag_cache.get(cache_key)
+    if entry is None:
+        return None
+    
+    tags, expires = entry
+    if time.time() >= expires:
+        del _tag_cache[cache_key]
+        return None
+    
+    _tag_cache.move_to_end(cache_key)
+    return tags
+
+def put_cached_tags(cache_key: str, tags: List[str]) -> None:
+    """Cache tags for the key, evicting the least recently used entry when full."""
+    _tag_cache[cache_key] = (tags, time.time() + TAG_CACHE_TTL)
+    _tag_cache.move_to_end(cache_key)
+    while len(_tag_cache) > TAG_CACHE_MAX_ENTRIES:
+        _tag_cache.popitem(last=False)
+
 def build_tag_generation_prompt(quote: str, author: str, existing_tags: List[str]) -> str:
     """Build the prompt for OpenAI tag generation."""
     existing_tags_text = ', '.join(existing_tags) if existing_tags else 'No existing tags provided.'
@@ -171,21 +399,69 @@ Instructions:
 
 Example response: ["Thinking", "Wisdom", "Reflection"]'''
 
+def build_batch_tag_generation_prompt(quotes: List[tuple], existing_tags: List[str]) -> str:
+    """Build one prompt that asks for tags for several numbered quotes."""
+    existing_tags_text = ', '.join(existing_tags) if existing_tags else 'No existing tags provided.'
+    numbered_quotes = '\n'.join(
+        f'{number}. "{quote}" — {author}' for number, (quote, author) in enumerate(quotes, start=1)
+    )
+    
+    return f'''Analyze each numbered quote below and select exactly 3-5 tags that best capture its core meaning. Choose ONLY from the existing tags provided.
+
+Quotes:
+{numbered_quotes}
+
+Available tags to choose from: {existing_tags_text}
+
+Instructions:
+1. Think deeply about what each quote is really about (not just surface keywords)
+2. Select 3-5 tags from the list above that best match each quote's meaning
+3. Avoid tags that don't strongly relate to a quote's core message
+4. Return only a JSON object mapping each quote number to its array of selected tags
+
+Example response: {{"1": ["Thinking", "Wisdom", "Reflection"], "2": ["Courage", "Action", "Leadership"]}}'''
+
+def parse_batch_tags_from_response(content: str, count: int) -> List[List[str]]:
+    """Parse per-quote tag lists from a batched response; missing quotes get no tags."""
+    clean_content = MARKDOWN_FENCE_PATTERN.sub('', content).strip()
+    
+    try:
+        object_match = JSON_OBJECT_PATTERN.search(clean_content)
+        tags_by_number = loads_json(object_match.group(0) if object_match else clean_content)
+        if not isinstance(tags_by_number, dict):
+            raise ValueError('expected a JSON object')
+    except Exception as e:
+        logger.error(f"Error parsing batched tags: {e}, Content: {content}")
+        # Fall back to extracting each numbered array on its own
+        tags_by_number = {}
+        for number, array_text in NUMBERED_ARRAY_PATTERN.findall(clean_content):
+            try:
+                tags_by_number[number] = loads_json(array_text)
+            except json.JSONDecodeError:
+                continue
+    
+    batch_tags = []
+    for number in range(1, count + 1):
+        tags = tags_by_number.get(str(number))
+        if isinstance(tags, list):
+            batch_tags.append([str(tag).strip() for tag in tags if tag])
+        else:
+            batch_tags.append([])
+    return batch_tags
+
 def parse_tags_from_response(content: str) -> List[str]:
     """Parse tags from OpenAI's response, handling various formats."""
     try:
         # Clean up the response - remove markdown formatting if present
-        clean_content = content.strip()
-        clean_content = clean_content.replace('```json', '').replace('```', '').strip()
+        clean_content = MARKDOWN_FENCE_PATTERN.sub('', content).strip()
         
         # Find JSON array pattern
-        import re
-        json_match = re.search(r'\[(.*?)\]', clean_content, re.DOTALL)
+        json_match = JSON_ARRAY_PATTERN.search(clean_content)
         if json_match:
             clean_content = json_match.group(0)
         
         # Parse the JSON array
-        tags = json.loads(clean_content)
+        tags = loads_json(clean_content)
         
         # Ensure we have a list of strings
         if isinstance(tags, list):
@@ -201,9 +477,8 @@ def parse_tags_from_response(content: str) -> List[str]:
 
 def extract_tags_fallback(content: str) -> List[str]:
     """Fallback method to extract tags if JSON parsing fails."""
-    import re
     # Look for quoted strings
-    matches = re.findall(r'"([^"]+)"', content)
+    matches = QUOTED_STRING_PATTERN.findall(content)
     if matches:
         return matches[:5]  # Return up to 5 tags
     return []
\ No newline at end of file
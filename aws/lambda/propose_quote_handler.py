@@ -4,9 +4,12 @@ import os
 import uuid
 from datetime import datetime
 from decimal import Decimal
+from boto3.dynamodb.types import TypeSerializer
 
 dynamodb = boto3.resource('dynamodb')
+dynamodb_client = boto3.client('dynamodb')
 ses_client = boto3.client('ses', region_name='us-east-1')
+sqs = boto3.client('sqs')
 table_name = os.environ.get('TABLE_NAME', 'quote-me-proposed-quotes')
 table = dynamodb.Table(table_name)
 # Main quotes table for approved quotes
@@ -14,6 +17,16 @@ quotes_table_name = os.environ.get('QUOTES_TABLE_NAME', 'quote-me-quotes')
 quotes_table = dynamodb.Table(quotes_table_name)
 # Sender email for notifications
 sender_email = os.environ.get('SENDER_EMAIL', 'noreply@anystupididea.com')
+# Queue consumed by tag_fanout_handler, which writes the tag mapping rows.
+# Required: without it approved quotes would silently lose their tag mappings
+tag_fanout_queue_url = os.environ['TAG_FANOUT_QUEUE_URL']
+
+# Built once so the approve path can hand pre-serialized items to the low-level client
+serializer = TypeSerializer()
+
+def serialize_item(item):
+    """Convert a plain dict to DynamoDB AttributeValue format"""
+    return {key: serializer.serialize(value) for key, value in item.items()}
 
 def decimal_default(obj):
     """Helper to convert Decimal to float for JSON serialization"""
@@ -333,23 +346,32 @@ def lambda_handler(event, context):
                     }
                     
                     # Add tags if they exist
-                    if 'tags' in proposed_quote and proposed_quote['tags']:
-                        quote_item['tags'] = proposed_quote['tags']
-                        
-                        # Also create tag entries for each tag (following existing pattern)
-                        for tag in proposed_quote['tags']:
-                            quotes_table.put_item(Item={
-                                'PK': f'TAG#{tag}',
-                                'SK': f'QUOTE#{new_quote_id}',
-                                'id': f'tag#{tag}#{new_quote_id}',
-                                'type': 'tag_mapping',
-                                'tag': tag,
-                                'quote_id': new_quote_id,
-                                'created_at': timestamp
-                            })
+                    tags = proposed_quote.get('tags') or []
+                    if tags:
+                        quote_item['tags'] = tags
                     
                     # Save to main quotes table
-                    quotes_table.put_item(Item=quote_item)
+                    dynamodb_client.put_item(
+                        TableName=quotes_table_name,
+                        Item=serialize_item(quote_item)
+                    )
+                    
+                    # Tag mapping rows are denormalized indexes that the response
+                    # doesn't need, so hand them off to tag_fanout_handler. The quote
+                    # is already saved, so a failed send is logged rather than failing
+                    # the approval
+                    if tags:
+                        try:
+                            sqs.send_message(
+                                QueueUrl=tag_fanout_queue_url,
+                                MessageBody=json.dumps({
+                                    'quote_id': new_quote_id,
+                                    'tags': tags,
+                                    'timestamp': timestamp
+                                })
+                            )
+                        except Exception as e:
+                            print(f"Error queueing tag mappings for quote {new_quote_id} (tags {tags}): {str(e)}")
                 
                 return {
                     'statusCode': 200,
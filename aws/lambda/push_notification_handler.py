@@ -11,8 +11,15 @@ from typing import Dict, List, Optional
 import requests
 from datetime import datetime, timedelta
 from decimal import Decimal
-import jwt
 import time
+import random
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    # Fallback to the stdlib json module if orjson is not available
+    orjson = None
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
@@ -23,10 +30,55 @@ FCM_API_URL = 'https://fcm.googleapis.com/v1/projects/{project_id}/messages:send
 FCM_SCOPE = 'https://www.googleapis.com/auth/firebase.messaging'
 QUOTES_TABLE = os.environ.get('QUOTES_TABLE_NAME')
 USER_PROFILES_TABLE = os.environ.get('USER_PROFILES_TABLE_NAME')
+# Raw analytics events are stored in DynamoDB; counts also go to CloudWatch
+# as Embedded Metric Format log lines
 ANALYTICS_TABLE = os.environ.get('ANALYTICS_TABLE_NAME', 'dcc-notification-analytics')
+METRICS_NAMESPACE = 'DCC/Notifications'
+
+# Service account is parsed once per container rather than on every send
+SERVICE_ACCOUNT = json.loads(FCM_SERVICE_ACCOUNT_JSON) if FCM_SERVICE_ACCOUNT_JSON else None
+FCM_PROJECT_ID = SERVICE_ACCOUNT['project_id'] if SERVICE_ACCOUNT else None
+# Signing key is loaded on the first token refresh, then kept so later
+# refreshes don't re-parse the PEM
+_fcm_private_key = None
+
+# OAuth2 access tokens are valid for an hour; reuse them across warm invocations
+ACCESS_TOKEN_LIFETIME = 3600
+ACCESS_TOKEN_REFRESH_MARGIN = 300
+_cached_access_token = None
+_cached_token_exp = 0
 
 # Initialize AWS clients
 dynamodb = boto3.resource('dynamodb')
+user_table = dynamodb.Table(USER_PROFILES_TABLE)
+quotes_table = dynamodb.Table(QUOTES_TABLE)
+analytics_table = dynamodb.Table(ANALYTICS_TABLE)
+
+# Device platforms a user profile can hold FCM tokens for
+FCM_PLATFORMS = ('ios', 'android', 'web')
+
+# Number of users notified in parallel by send_batch_notifications
+BATCH_MAX_WORKERS = 32
+
+# Shared HTTP session keeps TCP/TLS connections to Google alive between sends.
+# The pool is sized so every batch worker (each fanning out to up to three
+# devices) can hold a kept-alive connection instead of reconnecting.
+http_session = requests.Session()
+http_session.mount('https://', requests.adapters.HTTPAdapter(
+    pool_connections=2,  # fcm.googleapis.com and oauth2.googleapis.com
+    pool_maxsize=BATCH_MAX_WORKERS * 3
+))
+
+# Analytics writes run off the send path; lambda_handler waits for them
+# before returning so they aren't frozen with the execution environment
+analytics_executor = ThreadPoolExecutor(max_workers=4)
+_pending_analytics = []
+
+# Quote ids are cached in memory for random selection and refreshed hourly;
+# the chosen quote itself is read with a GetItem so edits show up immediately
+QUOTES_CACHE_TTL = 3600
+_quote_ids_cache: List[str] = []
+_quote_ids_cache_loaded_at = 0
 
 class DecimalEncoder(json.JSONEncoder):
     """Helper class to convert DynamoDB Decimal types to JSON."""
@@ -35,31 +87,68 @@ class DecimalEncoder(json.JSONEncoder):
             return float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+def decimal_default(obj):
+    """orjson default hook to convert DynamoDB Decimal types."""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError
+
+def dumps_json(obj) -> bytes:
+    """Serialize to UTF-8 JSON bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=decimal_default)
+    return json.dumps(obj, cls=DecimalEncoder).encode('utf-8')
+
+def loads_json(data):
+    """Parse JSON text or bytes, using orjson when available."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+def get_fcm_private_key():
+    """Load the service account private key, once per container."""
+    global _fcm_private_key
+    
+    if _fcm_private_key is None:
+        # Deferred: cryptography is only needed when a token has to be signed
+        from cryptography.hazmat.primitives import serialization
+        _fcm_private_key = serialization.load_pem_private_key(
+            SERVICE_ACCOUNT['private_key'].encode(), password=None
+        )
+    return _fcm_private_key
+
 def get_access_token():
-    """Get OAuth2 access token for FCM v1 API using service account."""
+    """Get OAuth2 access token for FCM v1 API using service account.
+    
+    The token is cached at module level and reused until shortly before it
+    expires, so warm invocations skip the JWT sign and token exchange.
+    """
+    global _cached_access_token, _cached_token_exp
     
-    if not FCM_SERVICE_ACCOUNT_JSON:
+    if not SERVICE_ACCOUNT:
         raise ValueError("FCM_SERVICE_ACCOUNT_JSON not configured")
     
+    now = int(time.time())
+    if _cached_access_token and now < _cached_token_exp - ACCESS_TOKEN_REFRESH_MARGIN:
+        return _cached_access_token
+    
     try:
-        # Parse service account JSON
-        service_account = json.loads(FCM_SERVICE_ACCOUNT_JSON)
-        
         # Create JWT
-        now = int(time.time())
         payload = {
-            'iss': service_account['client_email'],
+            'iss': SERVICE_ACCOUNT['client_email'],
             'scope': FCM_SCOPE,
             'aud': 'https://oauth2.googleapis.com/token',
             'iat': now,
-            'exp': now + 3600  # 1 hour expiry
+            'exp': now + ACCESS_TOKEN_LIFETIME
         }
         
-        # Sign JWT with private key
-        token = jwt.encode(payload, service_account['private_key'], algorithm='RS256')
+        # Sign JWT with private key (PyJWT is imported here since cached
+        # tokens make this path rare on warm invocations)
+        import jwt
+        token = jwt.encode(payload, get_fcm_private_key(), algorithm='RS256')
         
         # Exchange JWT for access token
-        response = requests.post(
+        response = http_session.post(
             'https://oauth2.googleapis.com/token',
             data={
                 'grant_type': 'urn:ietf:params:oauth:grant-type:jwt-bearer',
@@ -71,7 +160,10 @@ def get_access_token():
         if response.status_code != 200:
             raise Exception(f"Failed to get access token: {response.text}")
         
-        access_token = response.json()['access_token']
+        token_data = loads_json(response.content)
+        access_token = token_data['access_token']
+        _cached_access_token = access_token
+        _cached_token_exp = now + int(token_data.get('expires_in', ACCESS_TOKEN_LIFETIME))
         logger.info("Successfully obtained FCM access token")
         return access_token
         
@@ -93,29 +185,29 @@ def lambda_handler(event, context):
     }
     """
     
-    if not FCM_SERVER_KEY:
-        logger.error("FCM_SERVER_KEY not configured")
+    if not SERVICE_ACCOUNT:
+        logger.error("FCM_SERVICE_ACCOUNT_JSON not configured")
         return {
             'statusCode': 500,
             'body': json.dumps({'error': 'Push notifications not configured'})
         }
     
     action = event.get('action', 'send_individual')
+    action_handler = ACTION_HANDLERS.get(action)
+    if action_handler is None:
+        return {
+            'statusCode': 400,
+            'body': json.dumps({'error': f'Unknown action: {action}'})
+        }
     
     try:
-        if action == 'send_individual':
-            result = send_individual_notification(event)
-        elif action == 'send_batch':
-            result = send_batch_notifications(event)
-        else:
-            return {
-                'statusCode': 400,
-                'body': json.dumps({'error': f'Unknown action: {action}'})
-            }
+        result = action_handler(event)
+        
+        flush_pending_analytics()
         
         return {
             'statusCode': 200,
-            'body': json.dumps(result, cls=DecimalEncoder)
+            'body': dumps_json(result).decode('utf-8')
         }
         
     except Exception as e:
@@ -125,21 +217,30 @@ def lambda_handler(event, context):
             'body': json.dumps({'error': str(e)})
         }
 
-def send_individual_notification(event: Dict) -> Dict:
-    """Send a push notification to a single user."""
+def send_individual_notification(event: Dict, quote: Optional[Dict] = None,
+                                 access_token: Optional[str] = None,
+                                 user: Optional[Dict] = None,
+                                 payload_template: Optional[Dict] = None,
+                                 analytics_items: Optional[List[Dict]] = None) -> Dict:
+    """Send a push notification to a single user.
+    
+    The batch path passes in the quote, access token, user profile and FCM
+    payload template it already built so they aren't redone for every user,
+    plus a list that collects analytics rows for one batched write.
+    """
     
     user_id = event.get('userId')
     if not user_id:
         raise ValueError("userId is required for individual notification")
     
     # Get user profile
-    user_table = dynamodb.Table(USER_PROFILES_TABLE)
-    user_response = user_table.get_item(Key={'userId': user_id})
-    
-    if 'Item' not in user_response:
-        raise ValueError(f"User {user_id} not found")
-    
-    user = user_response['Item']
+    if user is None:
+        user_response = user_table.get_item(Key={'userId': user_id})
+        
+        if 'Item' not in user_response:
+            raise ValueError(f"User {user_id} not found")
+        
+        user = user_response['Item']
     
     # Check if push notifications are enabled
     prefs = user.get('notificationPreferences', {})
@@ -150,11 +251,8 @@ def send_individual_notification(event: Dict) -> Dict:
     # Get FCM tokens
     fcm_tokens = user.get('fcmTokens', {})
     active_tokens = [
-        token for token in [
-            fcm_tokens.get('ios'),
-            fcm_tokens.get('android'),
-            fcm_tokens.get('web')
-        ] if token
+        (platform, token) for platform in FCM_PLATFORMS
+        if (token := fcm_tokens.get(platform))
     ]
     
     if not active_tokens:
@@ -162,22 +260,34 @@ def send_individual_notification(event: Dict) -> Dict:
         return {'message': 'No FCM tokens found', 'sent': False}
     
     # Get quote
-    quote = get_quote_for_notification(event.get('quoteId'))
+    if quote is None:
+        quote = get_quote_for_notification(event.get('quoteId'))
+    if payload_template is None:
+        payload_template = build_payload_template(quote)
+    # Fetch the token once so the device threads don't each refresh it
+    if access_token is None:
+        access_token = get_access_token()
     
-    # Send notification to all user's devices
-    results = []
-    for token in active_tokens:
-        result = send_fcm_notification(token, quote, user_id)
-        results.append(result)
+    # Send notification to all user's devices concurrently
+    with ThreadPoolExecutor(max_workers=len(active_tokens)) as executor:
+        results = list(executor.map(
+            lambda device: send_fcm_notification(device[1], quote, user_id, access_token,
+                                                 payload_template, platform=device[0]),
+            active_tokens
+        ))
     
-    # Track analytics
-    track_notification_event(user_id, quote['id'], 'push_sent', {
+    # Track analytics in the background (or collect it for the batch write)
+    metadata = {
         'devices': len(active_tokens),
         'test_mode': event.get('testMode', False)
-    })
+    }
+    if analytics_items is not None:
+        analytics_items.append(build_notification_event(user_id, quote['id'], 'push_sent', metadata))
+    else:
+        submit_analytics(track_notification_event, user_id, quote['id'], 'push_sent', metadata)
     
     # Update user stats
-    update_user_notification_stats(user_id, 'push')
+    submit_analytics(update_user_notification_stats, user_id, 'push')
     
     return {
         'message': 'Notification sent',
@@ -194,40 +304,65 @@ def send_batch_notifications(event: Dict) -> Dict:
     if not user_ids:
         raise ValueError("userIds array is required for batch notification")
     
-    # Get quote for this batch
+    # Get quote and user profiles once for the whole batch
     quote = get_quote_for_notification(event.get('quoteId'))
+    users_by_id = fetch_users_batch(user_ids)
     
-    success_count = 0
-    failure_count = 0
-    results = []
-    
+    # Users who are missing, opted out or have no devices are answered locally
+    skipped = {}
+    sendable_ids = []
     for user_id in user_ids:
+        user = users_by_id.get(user_id)
+        if user is None:
+            skipped[user_id] = {'userId': user_id, 'success': False, 'error': f"User {user_id} not found"}
+        elif not user.get('notificationPreferences', {}).get('enablePush', False):
+            skipped[user_id] = {'userId': user_id, 'success': False, 'message': 'Push notifications disabled for user'}
+        elif not any(user.get('fcmTokens', {}).get(platform) for platform in FCM_PLATFORMS):
+            skipped[user_id] = {'userId': user_id, 'success': False, 'message': 'No FCM tokens found'}
+        else:
+            sendable_ids.append(user_id)
+    
+    test_mode = event.get('testMode', False)
+    analytics_items = []
+    sent = {}
+    
+    def notify_user(user_id):
         try:
             result = send_individual_notification({
                 'userId': user_id,
                 'quoteId': quote['id'],
-                'testMode': event.get('testMode', False)
-            })
+                'testMode': test_mode
+            }, quote=quote, access_token=access_token, user=users_by_id[user_id],
+               payload_template=payload_template, analytics_items=analytics_items)
             
-            if result.get('sent'):
-                success_count += 1
-            else:
-                failure_count += 1
-            
-            results.append({
+            return {
                 'userId': user_id,
                 'success': result.get('sent', False),
                 'message': result.get('message')
-            })
+            }
             
         except Exception as e:
             logger.error(f"Failed to send to user {user_id}: {str(e)}")
-            failure_count += 1
-            results.append({
+            return {
                 'userId': user_id,
                 'success': False,
                 'error': str(e)
-            })
+            }
+    
+    if sendable_ids:
+        # Only fetch an access token and build the payload if something will be sent
+        access_token = get_access_token()
+        payload_template = build_payload_template(quote)
+        
+        with ThreadPoolExecutor(max_workers=min(BATCH_MAX_WORKERS, len(sendable_ids))) as executor:
+            sent = dict(zip(sendable_ids, executor.map(notify_user, sendable_ids)))
+        
+        submit_analytics(write_notification_events, analytics_items)
+    
+    results = [skipped[user_id] if user_id in skipped else sent[user_id] for user_id in user_ids]
+    
+    success_count = sum(1 for result in results if result['success'])
+    failure_count = len(results) - success_count
     
     return {
         'message': f'Batch complete: {success_count} sent, {failure_count} failed',
@@ -237,81 +372,122 @@ def send_batch_notifications(event: Dict) -> Dict:
         'results': results
     }
 
-def send_fcm_notification(token: str, quote: Dict, user_id: str) -> Dict:
+def fetch_users_batch(user_ids: List[str]) -> Dict[str, Dict]:
+    """Fetch user profiles with BatchGetItem, 100 keys per request."""
+    
+    users_by_id = {}
+    unique_ids = list(dict.fromkeys(user_ids))
+    
+    for i in range(0, len(unique_ids), 100):
+        request_items = {
+            USER_PROFILES_TABLE: {
+                'Keys': [{'userId': user_id} for user_id in unique_ids[i:i + 100]]
+            }
+        }
+        
+        retry_count = 0
+        while request_items:
+            response = dynamodb.batch_get_item(RequestItems=request_items)
+            for user in response.get('Responses', {}).get(USER_PROFILES_TABLE, []):
+                users_by_id[user['userId']] = user
+            
+            # Retry throttled keys with exponential backoff
+            request_items = response.get('UnprocessedKeys') or {}
+            if request_items:
+                retry_count += 1
+                if retry_count > 5:
+                    logger.error(f"Giving up on {len(request_items[USER_PROFILES_TABLE]['Keys'])} unprocessed user keys")
+                    break
+                time.sleep(0.05 * (2 ** retry_count))
+    
+    return users_by_id
+
+def build_payload_template(quote: Dict) -> Dict:
+    """Build the per-quote part of the FCM message, shared by every token it's sent to."""
+    
+    # Truncate quote text for notification body (keeping full text in data)
+    body_text = quote['text']
+    if len(body_text) > 100:
+        body_text = body_text[:97] + '...'
+    
+    # FCM v1 API message structure, minus the per-recipient token and userId
+    return {
+        'notification': {
+            'title': 'Daily Nugget',
+            'body': f'"{body_text}" - {quote["author"]}'
+        },
+        'data': {
+            'quoteId': str(quote['id']),
+            'fullQuote': quote['text'],
+            'author': quote['author'],
+            'tags': dumps_json(quote.get('tags', [])).decode('utf-8'),
+            'clickAction': 'FLUTTER_NOTIFICATION_CLICK',
+            'deepLink': f'/quote/{quote["id"]}',
+            'notificationType': 'daily_nugget'
+        },
+        'android': {
+            'priority': 'high',
+            'notification': {
+                'channel_id': 'daily_nuggets',
+                'color': '#1A237E',  # Indigo theme color
+                'icon': 'ic_notification',
+                'sound': 'default'
+            }
+        },
+        'apns': {
+            'payload': {
+                'aps': {
+                    'category': 'DAILY_NUGGET',
+                    'mutable-content': 1,
+                    'content-available': 1,
+                    'badge': 1,
+                    'sound': 'default'
+                }
+            }
+        },
+        'webpush': {
+            'headers': {
+                'TTL': '86400'  # 24 hours
+            },
+            'notification': {
+                'icon': '/icons/icon-192x192.png',
+                'badge': '/icons/badge-72x72.png',
+                'actions': [
+                    {
+                        'action': 'favorite',
+                        'title': 'Favorite',
+                        'icon': '/icons/heart.png'
+                    },
+                    {
+                        'action': 'share', 
+                        'title': 'Share',
+                        'icon': '/icons/share.png'
+                    }
+                ]
+            }
+        }
+    }
+
+def send_fcm_notification(token: str, quote: Dict, user_id: str,
+                          access_token: Optional[str] = None,
+                          payload_template: Optional[Dict] = None,
+                          platform: Optional[str] = None) -> Dict:
     """Send notification via FCM v1 API."""
     
     try:
-        # Get service account details for project ID
-        service_account = json.loads(FCM_SERVICE_ACCOUNT_JSON)
-        project_id = service_account['project_id']
-        
-        # Get access token
-        access_token = get_access_token()
+        # Get access token (cached across sends) unless the caller supplied one
+        if access_token is None:
+            access_token = get_access_token()
         
-        # Truncate quote text for notification body (keeping full text in data)
-        body_text = quote['text']
-        if len(body_text) > 100:
-            body_text = body_text[:97] + '...'
+        if payload_template is None:
+            payload_template = build_payload_template(quote)
         
-        # FCM v1 API payload structure
+        # Only the token and userId differ between recipients
         payload = {
             'message': {
+                **payload_template,
                 'token': token,
-                'notification': {
-                    'title': 'Daily Nugget',
-                    'body': f'"{body_text}" - {quote["author"]}'
-                },
-                'data': {
-                    'quoteId': str(quote['id']),
-                    'fullQuote': quote['text'],
-                    'author': quote['author'],
-                    'tags': json.dumps(quote.get('tags', [])),
-                    'clickAction': 'FLUTTER_NOTIFICATION_CLICK',
-                    'deepLink': f'/quote/{quote["id"]}',
-                    'userId': user_id,
-                    'notificationType': 'daily_nugget'
-                },
-                'android': {
-                    'priority': 'high',
-                    'notification': {
-                        'channel_id': 'daily_nuggets',
-                        'color': '#1A237E',  # Indigo theme color
-                        'icon': 'ic_notification',
-                        'sound': 'default'
-                    }
-                },
-                'apns': {
-                    'payload': {
-                        'aps': {
-                            'category': 'DAILY_NUGGET',
-                            'mutable-content': 1,
-                            'content-available': 1,
-                            'badge': 1,
-                            'sound': 'default'
-                        }
-                    }
-                },
-                'webpush': {
-                    'headers': {
-                        'TTL': '86400'  # 24 hours
-                    },
-                    'notification': {
-                        'icon': '/icons/icon-192x192.png',
-                        'badge': '/icons/badge-72x72.png',
-                        'actions': [
-                            {
-                                'action': 'favorite',
-                                'title': 'Favorite',
-                                'icon': '/icons/heart.png'
-                            },
-                            {
-                                'action': 'share', 
-                                'title': 'Share',
-                                'icon': '/icons/share.png'
-                            }
-                        ]
-                    }
-                }
+                'data': {**payload_template['data'], 'userId': user_id}
             }
         }
         
@@ -320,20 +496,20 @@ def send_fcm_notification(token: str, quote: Dict, user_id: str) -> Dict:
             'Content-Type': 'application/json'
         }
         
-        api_url = FCM_API_URL.format(project_id=project_id)
-        response = requests.post(api_url, json=payload, headers=headers)
+        api_url = FCM_API_URL.format(project_id=FCM_PROJECT_ID)
+        response = http_session.post(api_url, data=dumps_json(payload), headers=headers)
         
         if response.status_code == 200:
-            response_data = response.json()
+            response_data = loads_json(response.content)
             logger.info(f"Successfully sent notification to token ending in ...{token[-6:]}")
             return {'success': True, 'messageId': response_data.get('name', 'unknown')}
         else:
-            response_data = response.json() if response.content else {}
+            response_data = loads_json(response.content) if response.content else {}
             logger.error(f"FCM v1 API error: {response.status_code} - {response_data}")
             
             # Handle invalid token errors
             if response.status_code == 404 or 'not-found' in response_data.get('error', {}).get('status', ''):
-                remove_invalid_token(user_id, token)
+                remove_invalid_token(user_id, token, platform)
             
             return {'success': False, 'error': response_data}
             
@@ -344,8 +520,6 @@ def send_fcm_notification(token: str, quote: Dict, user_id: str) -> Dict:
 def get_quote_for_notification(quote_id: Optional[str] = None) -> Dict:
     """Get a quote for the notification, either specified or random."""
     
-    quotes_table = dynamodb.Table(QUOTES_TABLE)
-    
     if quote_id:
         # Get specific quote
         response = quotes_table.get_item(Key={'id': quote_id})
@@ -353,45 +527,144 @@ def get_quote_for_notification(quote_id: Optional[str] = None) -> Dict:
             raise ValueError(f"Quote {quote_id} not found")
         return response['Item']
     else:
-        # Get random quote (similar to existing daily nuggets logic)
-        response = quotes_table.scan(
-            Limit=1,
-            Select='ALL_ATTRIBUTES'
+        # Pick a random id from the in-memory index and read just that quote
+        quote_ids = get_cached_quote_ids()
+        if not quote_ids:
+            raise ValueError("No quotes available")
+        
+        response = quotes_table.get_item(Key={'id': random.choice(quote_ids)})
+        if 'Item' not in response:
+            # Quote was deleted since the index was built; rebuild and retry once
+            quote_ids = get_cached_quote_ids(force_refresh=True)
+            if not quote_ids:
+                raise ValueError("No quotes available")
+            response = quotes_table.get_item(Key={'id': random.choice(quote_ids)})
+            if 'Item' not in response:
+                raise ValueError("No quotes available")
+        return response['Item']
+
+def get_cached_quote_ids(force_refresh: bool = False) -> List[str]:
+    """Return all quote ids, rescanning the table at most once per QUOTES_CACHE_TTL."""
+    global _quote_ids_cache, _quote_ids_cache_loaded_at
+    
+    if (not force_refresh and _quote_ids_cache
+            and time.time() - _quote_ids_cache_loaded_at < QUOTES_CACHE_TTL):
+        return _quote_ids_cache
+    
+    quote_ids = []
+    scan_kwargs = {
+        'ProjectionExpression': 'id, #type',
+        'ExpressionAttributeNames': {'#type': 'type'}
+    }
+    
+    while True:
+        response = quotes_table.scan(**scan_kwargs)
+        # Skip tag mappings, image jobs and other non-quote rows
+        quote_ids.extend(
+            item['id'] for item in response['Items']
+            if 'id' in item and item.get('type', 'quote') == 'quote'
         )
         
-        if response['Items']:
-            return response['Items'][0]
-        else:
-            raise ValueError("No quotes available")
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    _quote_ids_cache = quote_ids
+    _quote_ids_cache_loaded_at = time.time()
+    logger.info(f"Loaded {len(quote_ids)} quote ids into cache")
+    return quote_ids
+
+def submit_analytics(fn, *args):
+    """Run an analytics/stats write on the background executor."""
+    _pending_analytics.append(analytics_executor.submit(fn, *args))
+
+def flush_pending_analytics():
+    """Wait for background analytics writes queued during this invocation."""
+    while _pending_analytics:
+        _pending_analytics.pop().result()
+
+def build_notification_event(user_id: str, quote_id: str, event_type: str, metadata: Dict = None) -> Dict:
+    """Build a notification analytics item."""
+    
+    timestamp = datetime.utcnow().isoformat()
+    return {
+        'eventId': f"{user_id}#{timestamp}#{event_type}",
+        'userId': user_id,
+        'quoteId': quote_id,
+        'eventType': event_type,
+        'timestamp': timestamp,
+        'metadata': metadata or {}
+    }
+
+def emit_notification_metrics(event_type: str, users: int, devices: int, properties: Dict = None):
+    """Emit notification counts as a CloudWatch Embedded Metric Format log line.
+    
+    CloudWatch extracts the metrics from the log server-side, so this costs
+    no API call on the send path.
+    """
+    record = {
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['eventType']],
+                'Metrics': [
+                    {'Name': 'PushSent', 'Unit': 'Count'},
+                    {'Name': 'PushDevices', 'Unit': 'Count'}
+                ]
+            }]
+        },
+        'eventType': event_type,
+        'PushSent': users,
+        'PushDevices': devices,
+        **(properties or {})
+    }
+    print(dumps_json(record).decode('utf-8'))
 
 def track_notification_event(user_id: str, quote_id: str, event_type: str, metadata: Dict = None):
     """Track notification analytics."""
     
     try:
-        analytics_table = dynamodb.Table(ANALYTICS_TABLE)
-        
-        event_id = f"{user_id}#{datetime.utcnow().isoformat()}#{event_type}"
-        
-        item = {
-            'eventId': event_id,
+        metadata = metadata or {}
+        emit_notification_metrics(event_type, 1, metadata.get('devices', 0), {
             'userId': user_id,
             'quoteId': quote_id,
-            'eventType': event_type,
-            'timestamp': datetime.utcnow().isoformat(),
-            'metadata': metadata or {}
-        }
+            'testMode': metadata.get('test_mode', False)
+        })
         
-        analytics_table.put_item(Item=item)
+        analytics_table.put_item(Item=build_notification_event(user_id, quote_id, event_type, metadata))
         
     except Exception as e:
         logger.error(f"Failed to track analytics: {str(e)}")
 
+def write_notification_events(items: List[Dict]):
+    """Record a batch of notification analytics items.
+    
+    Emits one aggregated metrics line and writes the raw items 25 per request.
+    """
+    
+    try:
+        if not items:
+            return
+        
+        emit_notification_metrics(
+            items[0]['eventType'],
+            len(items),
+            sum(item['metadata'].get('devices', 0) for item in items),
+            {'quoteId': items[0]['quoteId']}
+        )
+        
+        with analytics_table.batch_writer(overwrite_by_pkeys=['eventId']) as batch:
+            for item in items:
+                batch.put_item(Item=item)
+        
+    except Exception as e:
+        logger.error(f"Failed to write analytics batch: {str(e)}")
+
 def update_user_notification_stats(user_id: str, notification_type: str):
     """Update user's notification statistics."""
     
     try:
-        user_table = dynamodb.Table(USER_PROFILES_TABLE)
-        
         user_table.update_item(
             Key={'userId': user_id},
             UpdateExpression="SET notificationStats.lastPushSent = :now",
@@ -403,28 +676,38 @@ def update_user_notification_stats(user_id: str, notification_type: str):
     except Exception as e:
         logger.error(f"Failed to update user stats: {str(e)}")
 
-def remove_invalid_token(user_id: str, token: str):
+def remove_invalid_token(user_id: str, token: str, platform: Optional[str] = None):
     """Remove an invalid FCM token from user profile."""
     
     try:
-        user_table = dynamodb.Table(USER_PROFILES_TABLE)
-        
-        # Determine which platform the token belongs to
-        user_response = user_table.get_item(Key={'userId': user_id})
-        if 'Item' not in user_response:
-            return
+        # Determine which platform the token belongs to (callers normally
+        # know it already, which saves a read)
+        if platform is None:
+            user_response = user_table.get_item(Key={'userId': user_id})
+            if 'Item' not in user_response:
+                return
+            
+            fcm_tokens = user_response['Item'].get('fcmTokens', {})
+            platform = next((p for p in ['ios', 'android', 'web'] if fcm_tokens.get(p) == token), None)
+            if platform is None:
+                return
         
-        fcm_tokens = user_response['Item'].get('fcmTokens', {})
+        # Only remove the token if it hasn't been replaced since we sent to it
+        user_table.update_item(
+            Key={'userId': user_id},
+            UpdateExpression=f"REMOVE fcmTokens.{platform}",
+            ConditionExpression=f"fcmTokens.{platform} = :token",
+            ExpressionAttributeValues={':token': token}
+        )
+        logger.info(f"Removed invalid {platform} token for user {user_id}")
         
-        # Find and remove the invalid token
-        for platform in ['ios', 'android', 'web']:
-            if fcm_tokens.get(platform) == token:
-                user_table.update_item(
-                    Key={'userId': user_id},
-                    UpdateExpression=f"REMOVE fcmTokens.{platform}"
-                )
-                logger.info(f"Removed invalid {platform} token for user {user_id}")
-                break
-                
+    except user_table.meta.client.exceptions.ConditionalCheckFailedException:
+        logger.info(f"{platform} token for user {user_id} already changed; not removing")
     except Exception as e:
-        logger.error(f"Failed to remove invalid token: {str(e)}")
\ No newline at end of file
+        logger.error(f"Failed to remove invalid token: {str(e)}")
+
+# Supported lambda_handler actions
+ACTION_HANDLERS = {
+    'send_individual': send_individual_notification,
+    'send_batch': send_batch_notifications
+}
@@ -1,22 +1,99 @@
 import json
 import random
-import boto3
-from boto3.dynamodb.conditions import Key, Attr
+import functools
 import logging
 import os
 from decimal import Decimal
 from datetime import datetime
 import urllib.parse
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import orjson
+except ImportError:
+    # Fallback to the stdlib json module if orjson is not available
+    orjson = None
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize DynamoDB
-dynamodb = boto3.resource('dynamodb')
 table_name = os.environ['QUOTES_TABLE_NAME']
-table = dynamodb.Table(table_name)
-tags_table = dynamodb.Table(os.environ['TAGS_TABLE'])
+tags_table_name = os.environ['TAGS_TABLE']
+
+# DynamoDB handles are created on first use, so invocations served entirely
+# from in-memory caches (e.g. /tags) never pay the boto3 import and setup
+@functools.lru_cache(maxsize=1)
+def get_dynamodb_config():
+    """TCP keep-alive and a connection pool large enough for concurrent requests"""
+    from botocore.config import Config
+    return Config(
+        tcp_keepalive=True,
+        max_pool_connections=50,
+        retries={'max_attempts': 3, 'mode': 'adaptive'}
+    )
+
+@functools.lru_cache(maxsize=1)
+def get_dynamodb():
+    """DynamoDB resource, created once per container"""
+    import boto3
+    return boto3.resource('dynamodb', config=get_dynamodb_config())
+
+@functools.lru_cache(maxsize=1)
+def get_dynamodb_client():
+    """Low-level client for hot single-item reads; skips the resource layer's
+    Decimal-producing deserializer"""
+    import boto3
+    return boto3.client('dynamodb', config=get_dynamodb_config())
+
+@functools.lru_cache(maxsize=1)
+def get_table():
+    """Quotes table handle"""
+    return get_dynamodb().Table(table_name)
+
+# Number of parallel scan segments used to read the tags table
+TAGS_SCAN_SEGMENTS = 4
+
+# Number of parallel scan segments used by search_quotes
+SEARCH_SCAN_SEGMENTS = 4
+
+# Number of parallel scan segments used by the tag-filtered random quote path
+RANDOM_TAG_SCAN_SEGMENTS = 4
+
+# Maximum number of tagged candidates collected for random selection
+RANDOM_TAG_CANDIDATES = 1000
+
+# Tag mapping item types (migration and tag fan-out respectively)
+TAG_MAPPING_TYPES = ('tag_quote_mapping', 'tag_mapping')
+
+# Attributes read from tag mapping items; the quotes themselves are batch fetched
+TAG_MAPPING_PROJECTION = '#type, quote_id'
+
+# Concurrency and retry limits for batch_get_quotes
+BATCH_GET_MAX_WORKERS = 4
+BATCH_GET_MAX_RETRIES = 3
+
+# Attributes read by format_quote_response
+QUOTE_PROJECTION = 'id, PK, quote, author, tags, image_url, created_at, updated_at'
+
+# Quote ids cached in memory for unfiltered random selection
+QUOTE_IDS_CACHE_TTL = 3600
+_quote_ids_cache = {'ids': (), 'expires': 0}
+
+# Next pages of author results prefetched in the background, kept in LRU order.
+# Entries expire quickly so a follow-up request never gets a stale page.
+AUTHOR_PREFETCH_MAX_PAGES = 64
+AUTHOR_PREFETCH_TTL = 30
+_author_prefetch = OrderedDict()
+_author_prefetch_lock = threading.Lock()
+prefetch_executor = ThreadPoolExecutor(max_workers=2)
+
+# /tags response body cached in memory across warm invocations
+TAGS_CACHE_TTL = 300
+_tags_cache = {'body': None, 'expires': 0}
 
 # CORS headers
 CORS_HEADERS = {
@@ -32,10 +109,24 @@ class DecimalEncoder(json.JSONEncoder):
             return int(obj) if obj % 1 == 0 else float(obj)
         return super(DecimalEncoder, self).default(obj)
 
+def decimal_default(obj):
+    """orjson default hook to convert DynamoDB Decimal types to int/float"""
+    if isinstance(obj, Decimal):
+        return int(obj) if obj % 1 == 0 else float(obj)
+    raise TypeError
+
+def dumps_json(obj):
+    """Serialize a response body to a JSON string, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=decimal_default).decode('utf-8')
+    return json.dumps(obj, cls=DecimalEncoder)
+
 def lambda_handler(event, context):
     """Main Lambda handler for optimized quote operations"""
     try:
-        logger.info(f"Event: {json.dumps(event)}")
+        # Only serialize the (multi-KB) proxy event when debug logging is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Event: {json.dumps(event)}")
         
         # Extract HTTP method and path
         http_method = event['httpMethod']
@@ -75,63 +166,66 @@ def get_random_quote(query_params):
     """Get a random quote, optionally filtered by tags"""
     try:
         tags = query_params.get('tags', '').split(',') if query_params.get('tags') else []
-        tags = [tag.strip() for tag in tags if tag.strip()]
+        # Drop blanks and duplicates so each tag adds at most one filter clause
+        tags = list(dict.fromkeys(tag.strip() for tag in tags if tag.strip()))
+        
+        # 'All' (offered by /tags) means no filter; use the indexed unfiltered path
+        if 'All' in tags:
+            tags = []
 
         if tags:
-            # Get quotes filtered by tags using scan
+            # Get quotes filtered by tags using a parallel scan
             # We scan the table and filter by checking if any of the requested tags
             # is in the quote's tags array
-            quotes = []
 
             # Build filter expression to match ANY of the requested tags
             filter_expressions = []
-            expression_attribute_values = {}
+            expression_attribute_values = {':quote_type': 'quote'}
             for i, tag in enumerate(tags):
                 filter_expressions.append(f'contains(tags, :tag{i})')
                 expression_attribute_values[f':tag{i}'] = tag
 
-            filter_expression = ' OR '.join(filter_expressions)
-
-            # Scan with filter
-            response = table.scan(
-                FilterExpression=filter_expression,
-                ExpressionAttributeValues=expression_attribute_values,
-                Limit=1000
+            # Only quote items count; untyped items are older quotes, as in get_quote_ids
+            filter_expression = (
+                f"({' OR '.join(filter_expressions)}) AND "
+                "(attribute_not_exists(#type) OR #type = :quote_type)"
             )
 
-            quotes = response['Items']
-
-            # Continue scanning if we don't have enough quotes and there are more pages
-            while 'LastEvaluatedKey' in response and len(quotes) < 1000:
-                response = table.scan(
-                    FilterExpression=filter_expression,
-                    ExpressionAttributeValues=expression_attribute_values,
-                    ExclusiveStartKey=response['LastEvaluatedKey'],
-                    Limit=1000 - len(quotes)
-                )
-                quotes.extend(response['Items'])
+            # Scan all segments concurrently so latency is one segment's worth of pages
+            scan_state = {'found': 0, 'lock': threading.Lock(), 'done': threading.Event()}
+
+            with ThreadPoolExecutor(max_workers=RANDOM_TAG_SCAN_SEGMENTS) as executor:
+                segment_samples = list(executor.map(
+                    lambda segment: scan_tagged_segment(segment, filter_expression,
+                                                        expression_attribute_values, scan_state),
+                    range(RANDOM_TAG_SCAN_SEGMENTS)
+                ))
+
+            # Merge the per-segment samples, weighting each by how many quotes it saw
+            selected_quote = None
+            seen = 0
+            for count, candidate in segment_samples:
+                seen += count
+                if count and random.randrange(seen) < count:
+                    selected_quote = candidate
         else:
-            # Get all quotes using scan
-            response = table.scan(Limit=1000)
-            quotes = response['Items']
+            # Pick a random id from the cached index and read only that quote
+            selected_quote = get_random_quote_by_id()
 
-        if not quotes:
+        if selected_quote is None:
             return {
                 'statusCode': 404,
                 'headers': CORS_HEADERS,
                 'body': json.dumps({'error': 'No quotes found'})
             }
 
-        # Select random quote
-        selected_quote = random.choice(quotes)
-
         # Format response
         formatted_quote = format_quote_response(selected_quote)
 
         return {
             'statusCode': 200,
             'headers': CORS_HEADERS,
-            'body': json.dumps(formatted_quote, cls=DecimalEncoder)
+            'body': dumps_json(formatted_quote)
         }
 
     except Exception as e:
@@ -142,6 +236,80 @@ def get_random_quote(query_params):
             'body': json.dumps({'error': 'Failed to retrieve quote'})
         }
 
+def scan_tagged_segment(segment, filter_expression, expression_attribute_values, scan_state):
+    """Reservoir-sample one tagged quote from a scan segment; returns (count, quote)"""
+    scan_kwargs = {
+        'Segment': segment,
+        'TotalSegments': RANDOM_TAG_SCAN_SEGMENTS,
+        'FilterExpression': filter_expression,
+        'ExpressionAttributeNames': {'#type': 'type'},
+        'ExpressionAttributeValues': expression_attribute_values,
+        'ProjectionExpression': QUOTE_PROJECTION
+    }
+    count = 0
+    chosen = None
+
+    while not scan_state['done'].is_set():
+        response = get_table().scan(**scan_kwargs)
+        # Keep each item with probability 1/count so no candidate list is built
+        for item in response['Items']:
+            count += 1
+            if random.randrange(count) == 0:
+                chosen = item
+
+        with scan_state['lock']:
+            scan_state['found'] += len(response['Items'])
+            if scan_state['found'] >= RANDOM_TAG_CANDIDATES:
+                scan_state['done'].set()
+
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+    return count, chosen
+
+def get_random_quote_by_id():
+    """Get one random quote via the cached id index; returns None if there are none"""
+    for force_refresh in (False, True):
+        quote_ids = get_quote_ids(force_refresh)
+        if not quote_ids:
+            return None
+        
+        item = get_quote_item(random.choice(quote_ids))
+        if item is not None:
+            return item
+        # The quote was deleted since the index was built; rebuild and retry once
+    
+    return None
+
+def get_quote_ids(force_refresh=False):
+    """Return all quote ids, rebuilding the cached index at most once per TTL"""
+    if not force_refresh and _quote_ids_cache['ids'] and time.time() < _quote_ids_cache['expires']:
+        return _quote_ids_cache['ids']
+    
+    scan_kwargs = {
+        'ProjectionExpression': 'id, #type',
+        'ExpressionAttributeNames': {'#type': 'type'}
+    }
+    quote_ids = []
+    
+    while True:
+        response = get_table().scan(**scan_kwargs)
+        # Skip metadata, tag mapping and image job records
+        quote_ids.extend(
+            item['id'] for item in response['Items']
+            if item.get('type', 'quote') == 'quote' and item.get('id', 'TAGS_METADATA') != 'TAGS_METADATA'
+        )
+        
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    _quote_ids_cache['ids'] = tuple(quote_ids)
+    _quote_ids_cache['expires'] = time.time() + QUOTE_IDS_CACHE_TTL
+    logger.info(f"Cached {len(quote_ids)} quote ids")
+    return _quote_ids_cache['ids']
+
 def get_quote_by_id(quote_id):
     """Get a specific quote by ID"""
     try:
@@ -153,23 +321,21 @@ def get_quote_by_id(quote_id):
             }
         
         # Query the quote directly using simple key structure
-        response = table.get_item(
-            Key={'id': quote_id}
-        )
+        item = get_quote_item(quote_id)
         
-        if 'Item' not in response:
+        if item is None:
             return {
                 'statusCode': 404,
                 'headers': CORS_HEADERS,
                 'body': json.dumps({'error': 'Requested quote was not found.'})
             }
         
-        formatted_quote = format_quote_response(response['Item'])
+        formatted_quote = format_quote_response(item)
         
         return {
             'statusCode': 200,
             'headers': CORS_HEADERS,
-            'body': json.dumps(formatted_quote, cls=DecimalEncoder)
+            'body': dumps_json(formatted_quote)
         }
         
     except Exception as e:
@@ -180,41 +346,69 @@ def get_quote_by_id(quote_id):
             'body': json.dumps({'error': 'Failed to retrieve quote'})
         }
 
+def get_quote_item(quote_id):
+    """Read one quote with the low-level client; returns a plain dict or None"""
+    response = get_dynamodb_client().get_item(
+        TableName=table_name,
+        Key={'id': {'S': quote_id}},
+        ProjectionExpression=QUOTE_PROJECTION
+    )
+    
+    if 'Item' not in response:
+        return None
+    return {name: flatten_attribute(value) for name, value in response['Item'].items()}
+
+def flatten_attribute(value):
+    """Convert a low-level DynamoDB attribute value to a plain Python value"""
+    if 'S' in value:
+        return value['S']
+    if 'L' in value:
+        return [flatten_attribute(v) for v in value['L']]
+    if 'SS' in value:
+        return value['SS']
+    if 'N' in value:
+        number = Decimal(value['N'])
+        return int(number) if number % 1 == 0 else float(number)
+    if 'M' in value:
+        return {k: flatten_attribute(v) for k, v in value['M'].items()}
+    if 'BOOL' in value:
+        return value['BOOL']
+    return None
+
 def get_all_tags():
     """Get all available tags from the TagsTable"""
+    if _tags_cache['body'] is not None and time.time() < _tags_cache['expires']:
+        return {
+            'statusCode': 200,
+            'headers': CORS_HEADERS,
+            'body': _tags_cache['body']
+        }
+
     try:
         # Always include 'All' option
-        tags = ['All']
+        tags = {'All'}
 
-        # Initial scan of tags table
-        response = tags_table.scan()
+        # Scan the tags table segments in parallel instead of page by page
+        with ThreadPoolExecutor(max_workers=TAGS_SCAN_SEGMENTS) as executor:
+            for segment_tags in executor.map(scan_tags_segment, range(TAGS_SCAN_SEGMENTS)):
+                tags.update(segment_tags)
 
-        for item in response['Items']:
-            if 'tag' in item:
-                tags.append(item['tag'])
-
-        # Continue scanning while there are more pages
-        while 'LastEvaluatedKey' in response:
-            response = tags_table.scan(
-                ExclusiveStartKey=response['LastEvaluatedKey']
-            )
-
-            for item in response['Items']:
-                if 'tag' in item:
-                    tags.append(item['tag'])
-
-        # Remove duplicates and sort
-        tags = sorted(list(set(tags)))
+        # Sort (duplicates were already removed by the set)
+        tags = sorted(tags)
 
         logger.info(f"Retrieved {len(tags)} total tags from TagsTable")
 
+        body = dumps_json({
+            'tags': tags,
+            'count': len(tags)
+        })
+        _tags_cache['body'] = body
+        _tags_cache['expires'] = time.time() + TAGS_CACHE_TTL
+
         return {
             'statusCode': 200,
             'headers': CORS_HEADERS,
-            'body': json.dumps({
-                'tags': tags,
-                'count': len(tags)
-            })
+            'body': body
         }
 
     except Exception as e:
@@ -230,6 +424,23 @@ def get_all_tags():
             })
         }
 
+def scan_tags_segment(segment):
+    """Collect tag names from one parallel scan segment of the TagsTable"""
+    paginator = get_dynamodb_client().get_paginator('scan')
+    pages = paginator.paginate(
+        TableName=tags_table_name,
+        Segment=segment,
+        TotalSegments=TAGS_SCAN_SEGMENTS,
+        ProjectionExpression='tag'
+    )
+    
+    # Tag names are plain strings, so read them straight from the low-level response
+    return {
+        item['tag']['S']
+        for page in pages
+        for item in page['Items'] if 'tag' in item
+    }
+
 def get_quotes_by_author(author, query_params):
     """Get quotes by a specific author with pagination"""
     try:
@@ -256,18 +467,29 @@ def get_quotes_by_author(author, query_params):
             except:
                 logger.warning(f"Invalid last_key: {last_key}")
         
+        from boto3.dynamodb.conditions import Key
+        
         # Query using AuthorDateIndex
         query_params = {
             'IndexName': 'AuthorDateIndex',
             'KeyConditionExpression': Key('author_normalized').eq(author_normalized),
+            'ProjectionExpression': QUOTE_PROJECTION,
             'Limit': limit,
             'ScanIndexForward': False  # Newest first
         }
         
         if exclusive_start_key:
             query_params['ExclusiveStartKey'] = exclusive_start_key
-            
-        response = table.query(**query_params)
+        
+        # Use the page prefetched by the previous request when there is one
+        response = take_prefetched_author_page(author_normalized, limit, exclusive_start_key)
+        if response is None:
+            response = get_table().query(**query_params)
+        
+        # Start fetching the next page while this one is serialized and returned.
+        # Only clients already paging through the author are likely to ask for it.
+        if exclusive_start_key and 'LastEvaluatedKey' in response:
+            prefetch_author_page(author_normalized, limit, query_params, response['LastEvaluatedKey'])
         
         quotes = [format_quote_response(item) for item in response['Items']]
         
@@ -279,12 +501,12 @@ def get_quotes_by_author(author, query_params):
         
         # Add pagination info
         if 'LastEvaluatedKey' in response:
-            result['last_key'] = urllib.parse.quote(json.dumps(response['LastEvaluatedKey'], cls=DecimalEncoder))
+            result['last_key'] = urllib.parse.quote(dumps_json(response['LastEvaluatedKey']))
         
         return {
             'statusCode': 200,
             'headers': CORS_HEADERS,
-            'body': json.dumps(result, cls=DecimalEncoder)
+            'body': dumps_json(result)
         }
         
     except Exception as e:
@@ -295,6 +517,53 @@ def get_quotes_by_author(author, query_params):
             'body': json.dumps({'error': 'Failed to retrieve quotes'})
         }
 
+def author_prefetch_key(author_normalized, limit, start_key):
+    """Key a prefetched author page by everything that determines its contents"""
+    return (author_normalized, limit, json.dumps(start_key, sort_keys=True, cls=DecimalEncoder))
+
+def take_prefetched_author_page(author_normalized, limit, start_key):
+    """Return a prefetched author page, or None if none is available or it has expired"""
+    if not start_key:
+        return None
+    
+    with _author_prefetch_lock:
+        entry = _author_prefetch.pop(author_prefetch_key(author_normalized, limit, start_key), None)
+    if entry is None:
+        return None
+    
+    future, expires = entry
+    if time.time() >= expires:
+        future.cancel()
+        return None
+    
+    try:
+        return future.result()
+    except Exception as e:
+        logger.warning(f"Prefetched author page failed, querying again: {str(e)}")
+        return None
+
+def prefetch_author_page(author_normalized, limit, query_params, start_key):
+    """Query the next author page in the background and keep it for the follow-up request"""
+    key = author_prefetch_key(author_normalized, limit, start_key)
+    now = time.time()
+    
+    with _author_prefetch_lock:
+        # Drop expired pages before adding another
+        for stale_key, (_, expires) in list(_author_prefetch.items()):
+            if expires <= now:
+                _author_prefetch.pop(stale_key)[0].cancel()
+        
+        if key in _author_prefetch:
+            _author_prefetch.move_to_end(key)
+            return
+        future = prefetch_executor.submit(
+            get_table().query, **{**query_params, 'ExclusiveStartKey': start_key}
+        )
+        _author_prefetch[key] = (future, now + AUTHOR_PREFETCH_TTL)
+        # Evict the least recently used pages
+        while len(_author_prefetch) > AUTHOR_PREFETCH_MAX_PAGES:
+            _author_prefetch.popitem(last=False)[1][0].cancel()
+
 def get_quotes_by_tag(tag, query_params):
     """Get quotes by a specific tag with pagination"""
     try:
@@ -321,7 +590,10 @@ def get_quotes_by_tag(tag, query_params):
                 logger.warning(f"Invalid last_key: {last_key}")
         
         # Get quotes for this tag using the mapping table
-        quotes = get_quotes_for_tag(tag, limit, exclusive_start_key)
+        quotes = [
+            format_quote_response(item)
+            for item in get_quotes_for_tag(tag, limit, exclusive_start_key)
+        ]
         
         result = {
             'quotes': quotes,
@@ -332,7 +604,7 @@ def get_quotes_by_tag(tag, query_params):
         return {
             'statusCode': 200,
             'headers': CORS_HEADERS,
-            'body': json.dumps(result, cls=DecimalEncoder)
+            'body': dumps_json(result)
         }
         
     except Exception as e:
@@ -358,23 +630,30 @@ def search_quotes(query_params):
         limit = int(query_params.get('limit', '50'))
         limit = min(limit, 1000)  # Cap at 1000
         
-        # For now, use scan with filter (can be optimized with OpenSearch later)
-        response = table.scan(
-            FilterExpression=Attr('type').eq('quote') & (
-                Attr('quote').contains(search_text) |
-                Attr('author').contains(search_text)
-            ),
-            Limit=limit * 2  # Get more items since we're filtering
+        from boto3.dynamodb.conditions import Attr
+        
+        # For now, use a parallel scan with filter (can be optimized with OpenSearch later).
+        # The lowercased *_normalized attributes make the match case-insensitive on the
+        # server; the raw attributes still catch rows written before they existed.
+        filter_expression = Attr('type').eq('quote') & (
+            Attr('quote_normalized').contains(search_text_lower) |
+            Attr('author_normalized').contains(search_text_lower) |
+            Attr('quote').contains(search_text) |
+            Attr('author').contains(search_text)
         )
+        search_state = {'found': 0, 'lock': threading.Lock(), 'done': threading.Event()}
         
-        # Further filter and format results
-        quotes = []
-        for item in response['Items']:
-            if (search_text_lower in item.get('quote', '').lower() or 
-                search_text_lower in item.get('author', '').lower()):
-                quotes.append(format_quote_response(item))
-                if len(quotes) >= limit:
-                    break
+        with ThreadPoolExecutor(max_workers=SEARCH_SCAN_SEGMENTS) as executor:
+            segment_matches = list(executor.map(
+                lambda segment: search_segment(segment, filter_expression, limit, search_state),
+                range(SEARCH_SCAN_SEGMENTS)
+            ))
+        
+        # Format results
+        quotes = [
+            format_quote_response(item)
+            for matches in segment_matches for item in matches
+        ][:limit]
         
         result = {
             'quotes': quotes,
@@ -385,7 +664,7 @@ def search_quotes(query_params):
         return {
             'statusCode': 200,
             'headers': CORS_HEADERS,
-            'body': json.dumps(result, cls=DecimalEncoder)
+            'body': dumps_json(result)
         }
         
     except Exception as e:
@@ -396,13 +675,44 @@ def search_quotes(query_params):
             'body': json.dumps({'error': 'Search failed'})
         }
 
+def search_segment(segment, filter_expression, limit, search_state):
+    """Scan one segment for search matches, stopping once the search has enough"""
+    scan_kwargs = {
+        'Segment': segment,
+        'TotalSegments': SEARCH_SCAN_SEGMENTS,
+        'FilterExpression': filter_expression,
+        'ProjectionExpression': QUOTE_PROJECTION
+    }
+    matches = []
+    
+    while not search_state['done'].is_set():
+        response = get_table().scan(**scan_kwargs)
+        
+        # Every returned item already matches, so no Python-side filtering is needed
+        matches.extend(response['Items'])
+        with search_state['lock']:
+            search_state['found'] += len(response['Items'])
+            if search_state['found'] >= limit:
+                search_state['done'].set()
+                break
+        
+        if 'LastEvaluatedKey' not in response:
+            break
+        scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+    
+    return matches
+
 def get_quotes_for_tag(tag_name, limit=50, exclusive_start_key=None):
     """Helper function to get quotes for a specific tag"""
     try:
+        from boto3.dynamodb.conditions import Key
+        
         # First, get the quote IDs from the tag-quote mapping
         query_params = {
             'IndexName': 'TagQuoteIndex',
             'KeyConditionExpression': Key('PK').eq(f'TAG#{tag_name}'),
+            'ProjectionExpression': TAG_MAPPING_PROJECTION,
+            'ExpressionAttributeNames': {'#type': 'type'},
             'Limit': limit,
             'ScanIndexForward': False  # Newest first
         }
@@ -410,20 +720,20 @@ def get_quotes_for_tag(tag_name, limit=50, exclusive_start_key=None):
         if exclusive_start_key:
             query_params['ExclusiveStartKey'] = exclusive_start_key
             
-        response = table.query(**query_params)
+        response = get_table().query(**query_params)
         
         # Get the full quote details in batch
-        quote_ids = []
-        for item in response['Items']:
-            if item.get('type') == 'tag_quote_mapping' and 'quote_id' in item:
-                quote_ids.append(item['quote_id'])
+        quote_ids = [
+            item['quote_id'] for item in response['Items'][:limit]  # Respect limit
+            if item.get('type') in TAG_MAPPING_TYPES and 'quote_id' in item
+        ]
         
         if not quote_ids:
             return []
-            
-        # Batch get the full quote details
-        quotes = batch_get_quotes(quote_ids[:limit])  # Respect limit
-        return quotes
+        
+        # Batch get the full quote details, keeping the index's newest-first order
+        quotes_by_id = {quote['id']: quote for quote in batch_get_quotes(quote_ids)}
+        return [quotes_by_id[quote_id] for quote_id in quote_ids if quote_id in quotes_by_id]
         
     except Exception as e:
         logger.error(f"Error in get_quotes_for_tag: {str(e)}")
@@ -435,37 +745,47 @@ def batch_get_quotes(quote_ids):
         if not quote_ids:
             return []
             
-        # DynamoDB batch_get_item can handle up to 100 items
+        # DynamoDB batch_get_item can handle up to 100 items per request,
+        # so fetch the chunks concurrently
         batch_size = 100
-        all_quotes = []
+        chunks = [quote_ids[i:i + batch_size] for i in range(0, len(quote_ids), batch_size)]
         
-        for i in range(0, len(quote_ids), batch_size):
-            batch_ids = quote_ids[i:i + batch_size]
-            
-            request_items = {
-                table.name: {
-                    'Keys': [
-                        {'PK': f'QUOTE#{quote_id}', 'SK': f'QUOTE#{quote_id}'}
-                        for quote_id in batch_ids
-                    ]
-                }
-            }
-            
-            response = dynamodb.batch_get_item(RequestItems=request_items)
-            
-            if table.name in response['Responses']:
-                all_quotes.extend(response['Responses'][table.name])
+        with ThreadPoolExecutor(max_workers=min(len(chunks), BATCH_GET_MAX_WORKERS)) as executor:
+            chunk_quotes = list(executor.map(batch_get_quote_chunk, chunks))
         
-        return all_quotes
+        return [quote for quotes in chunk_quotes for quote in quotes]
         
     except Exception as e:
         logger.error(f"Error in batch_get_quotes: {str(e)}")
         return []
 
+def batch_get_quote_chunk(batch_ids):
+    """Fetch up to 100 quotes, retrying unprocessed keys with exponential backoff"""
+    request_items = {
+        table_name: {
+            'Keys': [{'id': quote_id} for quote_id in batch_ids],
+            'ProjectionExpression': QUOTE_PROJECTION
+        }
+    }
+    quotes = []
+    
+    for attempt in range(BATCH_GET_MAX_RETRIES + 1):
+        response = get_dynamodb().batch_get_item(RequestItems=request_items)
+        quotes.extend(response['Responses'].get(table_name, []))
+        
+        request_items = response.get('UnprocessedKeys')
+        if not request_items:
+            return quotes
+        if attempt < BATCH_GET_MAX_RETRIES:
+            time.sleep(0.05 * (2 ** attempt))
+    
+    logger.warning(f"{len(request_items[table_name]['Keys'])} quotes left unprocessed after retries")
+    return quotes
+
 def get_all_quotes_from_index(limit=1000):
     """Get all quotes using scan"""
     try:
-        response = table.scan(
+        response = get_table().scan(
             Limit=limit
         )
         
@@ -475,20 +795,27 @@ def get_all_quotes_from_index(limit=1000):
         logger.error(f"Error in get_all_quotes_from_index: {str(e)}")
         return []
 
+def plain_value(value):
+    """Convert a DynamoDB Decimal to int/float; other values pass through"""
+    if isinstance(value, Decimal):
+        return int(value) if value % 1 == 0 else float(value)
+    return value
+
 def format_quote_response(item):
     """Format a quote item for API response"""
     try:
         # Handle both old and new data structures
         quote_id = item.get('id') or item.get('PK', '').replace('QUOTE#', '')
         
+        # Values are converted up front so serialization never needs a Decimal hook
         return {
             'id': quote_id,
             'quote': item.get('quote', ''),
             'author': item.get('author', ''),
-            'tags': item.get('tags', []),
+            'tags': [plain_value(tag) for tag in item.get('tags', [])],
             'image_url': item.get('image_url'),  # Include image URL if available
-            'created_at': item.get('created_at'),
-            'updated_at': item.get('updated_at')
+            'created_at': plain_value(item.get('created_at')),
+            'updated_at': plain_value(item.get('updated_at'))
         }
         
     except Exception as e:
@@ -500,4 +827,17 @@ def format_quote_response(item):
             'tags': [],
             'created_at': None,
             'updated_at': None
-        }
\ No newline at end of file
+        }
+
+def warm_up():
+    """Open DynamoDB connections during init so the first request skips the handshake"""
+    try:
+        get_dynamodb_client().get_item(TableName=table_name, Key={'id': {'S': '__warmup__'}})
+        get_table().get_item(Key={'id': '__warmup__'})
+    except Exception as e:
+        logger.warning(f"DynamoDB warm-up failed: {str(e)}")
+
+# Provisioned-concurrency inits are not on a request path, so pay the boto3
+# setup and TLS handshake there; on-demand cold starts stay lazy
+if os.environ.get('AWS_LAMBDA_INITIALIZATION_TYPE') == 'provisioned-concurrency':
+    warm_up()
@@ -1,31 +1,50 @@
 import json
 import boto3
 from boto3.dynamodb.conditions import Key
+from boto3.dynamodb.types import TypeDeserializer
+from botocore.config import Config
 import logging
 import os
-from decimal import Decimal
+from collections import Counter, defaultdict
 from datetime import datetime, timezone
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# Per-write messages are DEBUG; set LOG_LEVEL=DEBUG to see them
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
-# Initialize DynamoDB
-dynamodb = boto3.resource('dynamodb')
+# Initialize DynamoDB with TCP keep-alive so warm invocations reuse connections.
+# Counter updates are logged and dropped if they ultimately fail, so retry
+# throttling generously with client-side rate limiting before giving up
+dynamodb_config = Config(
+    tcp_keepalive=True,
+    max_pool_connections=50,
+    retries={'max_attempts': 10, 'mode': 'adaptive'}
+)
+dynamodb = boto3.resource('dynamodb', config=dynamodb_config)
 table_name = os.environ['TABLE_NAME']
 table = dynamodb.Table(table_name)
 
+# Covers every stream attribute type (S, N, B, SS, NS, BS, BOOL, NULL, L, M)
+deserializer = TypeDeserializer()
+
 def lambda_handler(event, context):
     """Process DynamoDB Stream events to maintain aggregations"""
     try:
         logger.info(f"Processing {len(event['Records'])} stream records")
         
+        # Pass 1: sum the changes per tag and author across the whole batch
+        aggregates = new_batch_aggregates()
         for record in event['Records']:
             try:
-                process_stream_record(record)
+                process_stream_record(record, aggregates)
             except Exception as e:
                 logger.error(f"Error processing individual record: {str(e)}")
                 # Continue processing other records
+        
+        # Pass 2: one write per unique tag and author
+        apply_batch_aggregates(aggregates)
                 
         return {'statusCode': 200, 'body': 'Successfully processed stream records'}
         
@@ -33,18 +52,63 @@ def lambda_handler(event, context):
         logger.error(f"Error in stream processor: {str(e)}")
         return {'statusCode': 500, 'body': f'Error processing stream: {str(e)}'}
 
-def process_stream_record(record):
+def new_batch_aggregates():
+    """Per-batch accumulators for tag and author changes"""
+    return {
+        'tag_delta': Counter(),
+        'tag_last_used': {},
+        'author_delta': Counter(),
+        'author_tags': defaultdict(list),
+        'author_last_date': {}
+    }
+
+def record_tag_change(aggregates, tag_name, increment, last_used=None):
+    """Accumulate a tag count change, keeping the latest last_used timestamp"""
+    aggregates['tag_delta'][tag_name] += increment
+    if last_used:
+        previous = aggregates['tag_last_used'].get(tag_name)
+        aggregates['tag_last_used'][tag_name] = max(previous, last_used) if previous else last_used
+
+def record_author_change(aggregates, author_name, tags, timestamp, increment):
+    """Accumulate an author count change; additions also carry tags and a date"""
+    aggregates['author_delta'][author_name] += increment
+    if increment > 0:
+        aggregates['author_tags'][author_name].extend(tags)
+        timestamp = timestamp or datetime.now(timezone.utc).isoformat()
+        previous = aggregates['author_last_date'].get(author_name)
+        aggregates['author_last_date'][author_name] = max(previous, timestamp) if previous else timestamp
+
+def apply_batch_aggregates(aggregates):
+    """Write the summed changes, one update_item per tag and per author"""
+    tags = set(aggregates['tag_delta']) | set(aggregates['tag_last_used'])
+    for tag_name in tags:
+        update_tag_count(
+            tag_name,
+            increment=aggregates['tag_delta'][tag_name],
+            last_used=aggregates['tag_last_used'].get(tag_name)
+        )
+    
+    authors = set(aggregates['author_delta']) | set(aggregates['author_last_date'])
+    for author_name in authors:
+        update_author_stats(
+            author_name,
+            aggregates['author_tags'].get(author_name, []),
+            aggregates['author_last_date'].get(author_name),
+            increment=aggregates['author_delta'][author_name]
+        )
+
+def process_stream_record(record, aggregates):
     """Process a single stream record"""
     event_name = record['eventName']
     
     if event_name == 'INSERT':
-        process_insert_event(record)
+        process_insert_event(record, aggregates)
     elif event_name == 'MODIFY':
-        process_modify_event(record)
+        process_modify_event(record, aggregates)
     elif event_name == 'REMOVE':
-        process_remove_event(record)
+        process_remove_event(record, aggregates)
 
-def process_insert_event(record):
+def process_insert_event(record, aggregates):
     """Process INSERT events"""
     try:
         new_image = record['dynamodb']['NewImage']
@@ -53,20 +117,22 @@ def process_insert_event(record):
         if item_type == 'quote':
             # Update tag counts and author aggregations for new quote
             quote_data = parse_dynamodb_item(new_image)
-            update_aggregations_for_quote_insert(quote_data)
+            update_aggregations_for_quote_insert(quote_data, aggregates)
             
         elif item_type == 'tag_quote_mapping':
             # Update tag usage statistics
             tag_name = extract_tag_from_pk(new_image.get('PK', {}).get('S', ''))
             if tag_name:
-                update_tag_count(tag_name, increment=1)
                 mapping_data = parse_dynamodb_item(new_image)
-                update_tag_last_used(tag_name, mapping_data.get('created_at'))
+                record_tag_change(
+                    aggregates, tag_name, 1,
+                    last_used=mapping_data.get('created_at') or datetime.now(timezone.utc).isoformat()
+                )
                 
     except Exception as e:
         logger.error(f"Error processing INSERT event: {str(e)}")
 
-def process_modify_event(record):
+def process_modify_event(record, aggregates):
     """Process MODIFY events"""
     try:
         old_image = record['dynamodb'].get('OldImage', {})
@@ -77,12 +143,12 @@ def process_modify_event(record):
             # Handle quote updates (tag changes, author changes)
             old_quote = parse_dynamodb_item(old_image) if old_image else {}
             new_quote = parse_dynamodb_item(new_image)
-            handle_quote_update(old_quote, new_quote)
+            handle_quote_update(old_quote, new_quote, aggregates)
             
     except Exception as e:
         logger.error(f"Error processing MODIFY event: {str(e)}")
 
-def process_remove_event(record):
+def process_remove_event(record, aggregates):
     """Process REMOVE events"""
     try:
         old_image = record['dynamodb']['OldImage']
@@ -91,18 +157,18 @@ def process_remove_event(record):
         if item_type == 'quote':
             # Update aggregations for removed quote
             quote_data = parse_dynamodb_item(old_image)
-            update_aggregations_for_quote_remove(quote_data)
+            update_aggregations_for_quote_remove(quote_data, aggregates)
             
         elif item_type == 'tag_quote_mapping':
             # Decrement tag count
             tag_name = extract_tag_from_pk(old_image.get('PK', {}).get('S', ''))
             if tag_name:
-                update_tag_count(tag_name, increment=-1)
+                record_tag_change(aggregates, tag_name, -1)
                 
     except Exception as e:
         logger.error(f"Error processing REMOVE event: {str(e)}")
 
-def update_aggregations_for_quote_insert(quote_data):
+def update_aggregations_for_quote_insert(quote_data, aggregates):
     """Update all aggregations when a quote is inserted"""
     try:
         author = quote_data.get('author')
@@ -111,14 +177,14 @@ def update_aggregations_for_quote_insert(quote_data):
         
         # Update author aggregation
         if author:
-            update_author_stats(author, tags, created_at, increment=1)
+            record_author_change(aggregates, author, tags, created_at, increment=1)
         
         # Update tag counts (handled by tag_quote_mapping inserts)
         
     except Exception as e:
         logger.error(f"Error updating aggregations for quote insert: {str(e)}")
 
-def update_aggregations_for_quote_remove(quote_data):
+def update_aggregations_for_quote_remove(quote_data, aggregates):
     """Update all aggregations when a quote is removed"""
     try:
         author = quote_data.get('author')
@@ -126,12 +192,12 @@ def update_aggregations_for_quote_remove(quote_data):
         
         # Update author aggregation
         if author:
-            update_author_stats(author, tags, None, increment=-1)
+            record_author_change(aggregates, author, tags, None, increment=-1)
             
     except Exception as e:
         logger.error(f"Error updating aggregations for quote remove: {str(e)}")
 
-def handle_quote_update(old_quote, new_quote):
+def handle_quote_update(old_quote, new_quote, aggregates):
     """Handle quote updates by comparing old and new versions"""
     try:
         old_author = old_quote.get('author')
@@ -142,67 +208,53 @@ def handle_quote_update(old_quote, new_quote):
         # Handle author change
         if old_author != new_author:
             if old_author:
-                update_author_stats(old_author, list(old_tags), None, increment=-1)
+                record_author_change(aggregates, old_author, list(old_tags), None, increment=-1)
             if new_author:
-                update_author_stats(new_author, list(new_tags), new_quote.get('updated_at'), increment=1)
+                record_author_change(aggregates, new_author, list(new_tags), new_quote.get('updated_at'), increment=1)
         
         # Handle tag changes (tag mappings will trigger their own events)
         
     except Exception as e:
         logger.error(f"Error handling quote update: {str(e)}")
 
-def update_tag_count(tag_name, increment=1):
-    """Update the quote count for a tag"""
+def update_tag_count(tag_name, increment=1, last_used=None):
+    """Update the quote count for a tag, and its last used timestamp when given"""
     try:
         now = datetime.now(timezone.utc).isoformat()
         
-        response = table.update_item(
-            Key={
-                'PK': f'TAG#{tag_name}',
-                'SK': f'TAG#{tag_name}'
-            },
-            UpdateExpression='SET quote_count = if_not_exists(quote_count, :zero) + :inc, updated_at = :now',
-            ExpressionAttributeValues={
-                ':inc': increment,
-                ':zero': 0,
-                ':now': now
-            },
-            ReturnValues='ALL_NEW'
-        )
+        update_expression = 'SET quote_count = if_not_exists(quote_count, :zero) + :inc, updated_at = :now'
+        expression_values = {
+            ':inc': increment,
+            ':zero': 0,
+            ':now': now
+        }
         
-        logger.info(f"Updated tag {tag_name} count by {increment}")
+        # Fold the last_used update into the same write instead of a second round trip
+        if last_used:
+            update_expression += ', last_used = :timestamp'
+            expression_values[':timestamp'] = last_used
         
-    except Exception as e:
-        logger.error(f"Error updating tag count for {tag_name}: {str(e)}")
-
-def update_tag_last_used(tag_name, timestamp):
-    """Update the last used timestamp for a tag"""
-    try:
-        if not timestamp:
-            timestamp = datetime.now(timezone.utc).isoformat()
-            
         table.update_item(
             Key={
                 'PK': f'TAG#{tag_name}',
                 'SK': f'TAG#{tag_name}'
             },
-            UpdateExpression='SET last_used = :timestamp, updated_at = :now',
-            ExpressionAttributeValues={
-                ':timestamp': timestamp,
-                ':now': datetime.now(timezone.utc).isoformat()
-            }
+            UpdateExpression=update_expression,
+            ExpressionAttributeValues=expression_values
         )
         
+        logger.debug("Updated tag %s count by %s", tag_name, increment)
+        
     except Exception as e:
-        logger.error(f"Error updating tag last used for {tag_name}: {str(e)}")
+        logger.error(f"Error updating tag count for {tag_name}: {str(e)}")
 
 def update_author_stats(author_name, tags, timestamp, increment=1):
-    """Update author statistics and aggregations"""
+    """Update author statistics and aggregations; a timestamp means quotes were added"""
     try:
         now = datetime.now(timezone.utc).isoformat()
         author_normalized = author_name.lower()
         
-        if increment > 0:
+        if timestamp:
             # Adding quotes
             update_expression = '''SET 
                 quote_count = if_not_exists(quote_count, :zero) + :inc,
@@ -210,9 +262,6 @@ def update_author_stats(author_name, tags, timestamp, increment=1):
                 last_quote_date = :timestamp,
                 updated_at = :now'''
             
-            if not timestamp:
-                timestamp = now
-                
             expression_values = {
                 ':inc': increment,
                 ':zero': 0,
@@ -237,32 +286,26 @@ def update_author_stats(author_name, tags, timestamp, increment=1):
                 ':now': now
             }
         
-        # Upsert author record
+        # Upsert the author record and its type attributes for queries in one write
+        update_expression += ', #type = :author_type, #name = :name, name_normalized = :name_normalized'
+        expression_values.update({
+            ':author_type': 'author',
+            ':name': author_name,
+            ':name_normalized': author_normalized
+        })
+        
         table.update_item(
             Key={
                 'PK': f'AUTHOR#{author_name}',
                 'SK': f'AUTHOR#{author_name}'
             },
             UpdateExpression=update_expression,
-            ExpressionAttributeValues=expression_values
-        )
-        
-        # Also create/update the type record for queries
-        table.put_item(
-            Item={
-                'PK': f'AUTHOR#{author_name}',
-                'SK': f'AUTHOR#{author_name}',
-                'type': 'author',
-                'name': author_name,
-                'name_normalized': author_normalized,
-                'updated_at': now
-            },
             ConditionExpression='attribute_not_exists(PK) OR #type = :author_type',
-            ExpressionAttributeNames={'#type': 'type'},
-            ExpressionAttributeValues={':author_type': 'author'}
+            ExpressionAttributeNames={'#type': 'type', '#name': 'name'},
+            ExpressionAttributeValues=expression_values
         )
         
-        logger.info(f"Updated author stats for {author_name}")
+        logger.debug("Updated author stats for %s", author_name)
         
     except Exception as e:
         logger.error(f"Error updating author stats for {author_name}: {str(e)}")
@@ -270,23 +313,7 @@ def update_author_stats(author_name, tags, timestamp, increment=1):
 def parse_dynamodb_item(dynamodb_item):
     """Parse DynamoDB item from stream format to Python dict"""
     try:
-        item = {}
-        for key, value in dynamodb_item.items():
-            if 'S' in value:
-                item[key] = value['S']
-            elif 'N' in value:
-                item[key] = Decimal(value['N'])
-            elif 'SS' in value:
-                item[key] = value['SS']
-            elif 'NS' in value:
-                item[key] = [Decimal(n) for n in value['NS']]
-            elif 'BOOL' in value:
-                item[key] = value['BOOL']
-            elif 'NULL' in value:
-                item[key] = None
-            # Add more type handling as needed
-        
-        return item
+        return {key: deserializer.deserialize(value) for key, value in dynamodb_item.items()}
         
     except Exception as e:
         logger.error(f"Error parsing DynamoDB item: {str(e)}")
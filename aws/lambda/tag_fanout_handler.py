@@ -0,0 +1,62 @@
+import json
+import os
+import boto3
+import logging
+
+# Configure logging
+logger = logging.getLogger()
+logger.setLevel(logging.INFO)
+
+# AWS services
+dynamodb = boto3.resource('dynamodb')
+quotes_table_name = os.environ.get('QUOTES_TABLE_NAME', 'quote-me-quotes')
+quotes_table = dynamodb.Table(quotes_table_name)
+
+def build_tag_mapping_items(quote_id, tags, timestamp):
+    """Build the denormalized TAG#<tag> -> QUOTE#<id> rows for an approved quote"""
+    return [
+        {
+            'PK': f'TAG#{tag}',
+            'SK': f'QUOTE#{quote_id}',
+            'id': f'tag#{tag}#{quote_id}',
+            'type': 'tag_mapping',
+            'tag': tag,
+            'quote_id': quote_id,
+            'created_at': timestamp
+        }
+        for tag in tags if tag
+    ]
+
+def lambda_handler(event, context):
+    """
+    AWS Lambda handler that fans out tag-mapping writes from SQS.
+    The approve path in propose_quote_handler enqueues one message per
+    approved quote and returns immediately; the rows are persisted here.
+    """
+
+    failures = []
+
+    for record in event['Records']:
+        try:
+            # Parse SQS message
+            message = json.loads(record['body'])
+            quote_id = message['quote_id']
+            tags = message.get('tags', [])
+            timestamp = message.get('timestamp')
+
+            items = build_tag_mapping_items(quote_id, tags, timestamp)
+
+            # batch_writer groups puts into 25-item BatchWriteItem calls
+            # and retries unprocessed items for us
+            with quotes_table.batch_writer() as batch:
+                for item in items:
+                    batch.put_item(Item=item)
+
+            logger.info(f"Wrote {len(items)} tag mappings for quote {quote_id}")
+
+        except Exception as e:
+            logger.error(f"Error writing tag mappings for message {record.get('messageId')}: {str(e)}")
+            failures.append({'itemIdentifier': record['messageId']})
+
+    # Only failed messages are returned to the queue for retry
+    return {'batchItemFailures': failures}
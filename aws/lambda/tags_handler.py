@@ -1,49 +1,94 @@
 import json
 import boto3
+from botocore.config import Config
 import os
+import time
 from decimal import Decimal
 
-dynamodb = boto3.resource('dynamodb')
+try:
+    import orjson
+except ImportError:
+    # Fallback to the stdlib json module if orjson is not available
+    orjson = None
+
+# TCP keep-alive so warm invocations reuse the DynamoDB connection
+dynamodb_config = Config(
+    tcp_keepalive=True,
+    max_pool_connections=50,
+    retries={'max_attempts': 3, 'mode': 'standard'}
+)
+dynamodb = boto3.resource('dynamodb', config=dynamodb_config)
 tags_table = dynamodb.Table(os.environ['TAGS_TABLE_NAME'])
 
+# Serialized tag list cached in memory across warm invocations
+TAGS_CACHE_TTL = 60
+_tags_cache = {'body': None, 'expires': 0}
+
+# Response headers, built once per container
+TAGS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'GET, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type, X-Api-Key',
+    'Cache-Control': f'max-age={TAGS_CACHE_TTL}'
+}
+ERROR_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+
 def decimal_default(obj):
     if isinstance(obj, Decimal):
         return float(obj)
     raise TypeError
 
+def dumps_json(obj):
+    """Serialize to a JSON string, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=decimal_default).decode('utf-8')
+    return json.dumps(obj, default=decimal_default)
+
+def tags_response(body):
+    """200 response for a serialized tag list, cacheable by clients and CDNs"""
+    return {
+        'statusCode': 200,
+        'headers': TAGS_HEADERS,
+        'body': body
+    }
+
 def lambda_handler(event, context):
     """Handle tags endpoint requests"""
+    # Serve warm invocations from the cached body while it is fresh
+    if _tags_cache['body'] is not None and time.time() < _tags_cache['expires']:
+        return tags_response(_tags_cache['body'])
+    
     try:
-        # Get all tags
-        response = tags_table.scan()
-        tags = [item['tag'] for item in response['Items']]
+        # Get all tags. Every item in the tags table is a tag keyed by name, so
+        # the scan reads no unrelated rows; project just the name to keep pages small
+        tags = []
+        scan_kwargs = {'ProjectionExpression': 'tag'}
         
-        # Continue scanning if there are more items
-        while 'LastEvaluatedKey' in response:
-            response = tags_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
+        while True:
+            response = tags_table.scan(**scan_kwargs)
             tags.extend([item['tag'] for item in response['Items']])
+            
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
         
         # Sort tags alphabetically
         tags.sort()
         
-        return {
-            'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'GET, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-Api-Key'
-            },
-            'body': json.dumps(tags, default=decimal_default)
-        }
+        body = dumps_json(tags)
+        _tags_cache['body'] = body
+        _tags_cache['expires'] = time.time() + TAGS_CACHE_TTL
+        
+        return tags_response(body)
         
     except Exception as e:
         print(f"Error: {str(e)}")
         return {
             'statusCode': 500,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*'
-            },
+            'headers': ERROR_HEADERS,
             'body': json.dumps({'message': 'Internal server error'})
         }
\ No newline at end of file
@@ -1,31 +1,108 @@
+import heapq
 import json
 import boto3
+import logging
 import os
-from datetime import datetime
-from typing import Dict, Any, List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
-cognito = boto3.client('cognito-idp')
-dynamodb = boto3.resource('dynamodb')
+try:
+    import orjson
+except ImportError:
+    # Fallback to the stdlib json module if orjson is not available
+    orjson = None
+
+# TCP keep-alive and a shared connection pool so warm invocations reuse
+# established connections to Cognito and DynamoDB
+aws_config = Config(
+    tcp_keepalive=True,
+    max_pool_connections=50,
+    retries={'max_attempts': 3, 'mode': 'standard'}
+)
+cognito = boto3.client('cognito-idp', config=aws_config)
+dynamodb = boto3.resource('dynamodb', config=aws_config)
+
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO'))
 
 USER_POOL_ID = os.environ['USER_POOL_ID']
 SUBSCRIPTION_TABLE = os.environ.get('SUBSCRIPTION_TABLE', 'dcc-daily-nuggets-subscriptions')
+subscription_table = dynamodb.Table(SUBSCRIPTION_TABLE)
+
+# CORS headers shared by every response
+CORS_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Headers': 'Content-Type,X-Api-Key,Authorization',
+    'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
+}
+
+# Constant responses for the preflight and authorization fast paths
+PREFLIGHT_RESPONSE = {
+    'statusCode': 200,
+    'headers': CORS_HEADERS,
+    'body': json.dumps({'message': 'CORS preflight successful'})
+}
+UNAUTHORIZED_RESPONSE = {
+    'statusCode': 401,
+    'headers': CORS_HEADERS,
+    'body': json.dumps({'error': 'Authorization required'})
+}
+FORBIDDEN_RESPONSE = {
+    'statusCode': 403,
+    'headers': CORS_HEADERS,
+    'body': json.dumps({'error': 'Admin access required'})
+}
+
+# Static error bodies, serialized once per container
+USER_ID_REQUIRED_BODY = json.dumps({'error': 'User ID required'})
+METHOD_NOT_ALLOWED_BODY = json.dumps({'error': 'Method not allowed'})
+BODY_REQUIRED_BODY = json.dumps({'error': 'Request body required'})
+INVALID_JSON_BODY = json.dumps({'error': 'Invalid JSON in request body'})
+USER_NOT_FOUND_BODY = json.dumps({'error': 'User not found'})
+FIND_USER_FAILED_BODY = json.dumps({'error': 'Failed to find user'})
+INTERNAL_ERROR_BODY = json.dumps({'error': 'Internal server error'})
+
+# Sort key for users Cognito returns without a creation date
+UNKNOWN_CREATE_DATE = datetime.min.replace(tzinfo=timezone.utc)
+
+# Concurrent BatchGetItem requests when joining subscriptions to the user list
+SUBSCRIPTION_FETCH_WORKERS = 4
+
+# Concurrent Cognito group membership sweeps when listing users
+GROUP_SWEEP_WORKERS = 8
+
+# Cognito's maximum ListUsers page size, also the default for ?pageSize
+USERS_PAGE_SIZE = 60
+
+# The only user attributes parse_user_data reads; ListUsers returns just these
+USER_ATTRIBUTES = ['sub', 'email', 'email_verified', 'name', 'preferred_username']
+
+# sub -> (Username, email) for this warm container. Subs never change, so entries
+# stay valid until the user is deleted; filled by lookups and user listings
+_users_by_sub: Dict[str, Tuple[str, Optional[str]]] = {}
+
+def dumps_json(obj: Any) -> str:
+    """
+    Serialize a response body to a JSON string, using orjson when available.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj).decode('utf-8')
+    return json.dumps(obj)
 
 def handler(event: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
     """
     Handler for user management endpoints.
     """
-    print(f"Event: {json.dumps(event)}")
-    
     http_method = event.get('httpMethod')
     
     # Handle OPTIONS requests for CORS preflight without authentication
     if http_method == 'OPTIONS':
-        return {
-            'statusCode': 200,
-            'headers': get_cors_headers(),
-            'body': json.dumps({'message': 'CORS preflight successful'})
-        }
+        return PREFLIGHT_RESPONSE
     
     # Get user info from API Gateway Cognito authorizer context
     request_context = event.get('requestContext', {})
@@ -33,131 +110,282 @@ def handler(event: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
     claims = authorizer.get('claims', {})
     
     if not claims:
-        return {
-            'statusCode': 401,
-            'headers': get_cors_headers(),
-            'body': json.dumps({'error': 'Authorization required'})
-        }
+        return UNAUTHORIZED_RESPONSE
     
     # Check if user is admin by looking at groups
     cognito_groups = claims.get('cognito:groups', '')
-    groups = cognito_groups.split(',') if cognito_groups else []
+    groups = frozenset(cognito_groups.split(',')) if cognito_groups else frozenset()
     
     if 'Admins' not in groups:
-        return {
-            'statusCode': 403,
-            'headers': get_cors_headers(),
-            'body': json.dumps({'error': 'Admin access required'})
-        }
+        return FORBIDDEN_RESPONSE
     
-    # Extract path parameters
-    path_params = event.get('pathParameters', {})
+    # Only authorized requests get this far, and the event is only serialized
+    # when debug logging is on
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(f"Event: {json.dumps(event)}")
     
     if http_method == 'GET':
-        return get_users_list()
+        return get_users_list(event.get('queryStringParameters') or {})
     elif http_method == 'PUT':
         # Handle admin group assignment/unassignment
-        user_id = path_params.get('userId')
+        user_id = (event.get('pathParameters') or {}).get('userId')
         if not user_id:
             return {
                 'statusCode': 400,
-                'headers': get_cors_headers(),
-                'body': json.dumps({'error': 'User ID required'})
+                'headers': CORS_HEADERS,
+                'body': USER_ID_REQUIRED_BODY
             }
         return update_user_admin_status(user_id, event.get('body'), claims)
     elif http_method == 'DELETE':
         # Handle user deletion
-        user_id = path_params.get('userId')
+        user_id = (event.get('pathParameters') or {}).get('userId')
         if not user_id:
             return {
                 'statusCode': 400,
-                'headers': get_cors_headers(),
-                'body': json.dumps({'error': 'User ID required'})
+                'headers': CORS_HEADERS,
+                'body': USER_ID_REQUIRED_BODY
             }
         return delete_user(user_id, claims)
     else:
         return {
             'statusCode': 405,
-            'headers': get_cors_headers(),
-            'body': json.dumps({'error': 'Method not allowed'})
+            'headers': CORS_HEADERS,
+            'body': METHOD_NOT_ALLOWED_BODY
         }
 
-def get_users_list() -> Dict[str, Any]:
+def get_users_list(query_params: Dict[str, Any]) -> Dict[str, Any]:
     """
-    Get list of all users with their attributes.
+    Get list of all users with their attributes, most recent first.
+    An optional ?limit=K returns only the K most recently created users.
+    Passing ?pageToken and/or ?pageSize returns a single Cognito page instead,
+    with a nextToken for the client to request the following page.
     """
+    if 'pageToken' in query_params or 'pageSize' in query_params:
+        return get_users_page(query_params)
+    
     try:
-        users = []
-        pagination_token = None
-        
-        # Get subscription data from DynamoDB
-        subscription_table = dynamodb.Table(SUBSCRIPTION_TABLE)
-        subscriptions = {}
-        try:
-            scan_response = subscription_table.scan()
-            for item in scan_response.get('Items', []):
-                user_id = item.get('user_id')
-                if user_id:
-                    subscriptions[user_id] = {
-                        'subscribed': item.get('subscribed', False),
-                        'timezone': item.get('timezone'),
-                        'preferred_time': item.get('preferred_time'),
-                        'created_at': item.get('created_at'),
-                        'updated_at': item.get('updated_at')
-                    }
-        except ClientError as e:
-            print(f"Error fetching subscriptions: {e}")
+        limit = int(query_params['limit']) if query_params.get('limit') else None
+    except ValueError:
+        limit = None
+    
+    try:
+        # Paginate through all users (60 is Cognito's maximum page size)
+        pages = cognito.get_paginator('list_users').paginate(
+            UserPoolId=USER_POOL_ID,
+            AttributesToGet=USER_ATTRIBUTES,
+            PaginationConfig={'PageSize': 60}
+        )
+        cognito_users = [user for page in pages for user in page.get('Users', [])]
+        total = len(cognito_users)
         
-        # Paginate through all users
-        while True:
-            if pagination_token:
-                response = cognito.list_users(
-                    UserPoolId=USER_POOL_ID,
-                    PaginationToken=pagination_token,
-                    Limit=60
-                )
-            else:
-                response = cognito.list_users(
-                    UserPoolId=USER_POOL_ID,
-                    Limit=60
-                )
-            
-            for user in response.get('Users', []):
-                user_data = parse_user_data(user, subscriptions)
-                users.append(user_data)
-            
-            pagination_token = response.get('PaginationToken')
-            if not pagination_token:
-                break
+        # Sort users by creation date (most recent first) on Cognito's datetimes,
+        # before formatting; users without a date go last. With a limit, a heap
+        # selects the top K and only those users are joined and formatted
+        if limit is not None and limit > 0:
+            cognito_users = heapq.nlargest(limit, cognito_users, key=user_create_date)
+        else:
+            cognito_users.sort(key=user_create_date, reverse=True)
         
-        # Sort users by creation date (most recent first)
-        users.sort(key=lambda x: x.get('created_at', ''), reverse=True)
+        return {
+            'statusCode': 200,
+            'headers': CORS_HEADERS,
+            'body': dumps_json({
+                'users': build_users(cognito_users),
+                'total': total
+            })
+        }
+    except ClientError as e:
+        print(f"Error listing users: {e}")
+        return {
+            'statusCode': 500,
+            'headers': CORS_HEADERS,
+            'body': dumps_json({'error': 'Failed to list users'})
+        }
+
+def get_users_page(query_params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get one page of users straight from Cognito, so memory and latency stay
+    bounded by the page size rather than the pool size. Users are sorted most
+    recent first within the page only.
+    """
+    try:
+        page_size = int(query_params.get('pageSize') or USERS_PAGE_SIZE)
+    except ValueError:
+        page_size = USERS_PAGE_SIZE
+    # Cognito accepts 1-60 users per ListUsers call
+    page_size = max(1, min(page_size, USERS_PAGE_SIZE))
+    
+    list_kwargs = {
+        'UserPoolId': USER_POOL_ID,
+        'AttributesToGet': USER_ATTRIBUTES,
+        'Limit': page_size
+    }
+    if query_params.get('pageToken'):
+        list_kwargs['PaginationToken'] = query_params['pageToken']
+    
+    try:
+        response = cognito.list_users(**list_kwargs)
+        cognito_users = sorted(response.get('Users', []), key=user_create_date, reverse=True)
         
         return {
             'statusCode': 200,
-            'headers': get_cors_headers(),
-            'body': json.dumps({
-                'users': users,
-                'total': len(users)
+            'headers': CORS_HEADERS,
+            'body': dumps_json({
+                'users': build_users(cognito_users),
+                'nextToken': response.get('PaginationToken')
             })
         }
     except ClientError as e:
         print(f"Error listing users: {e}")
+        if e.response['Error']['Code'] == 'InvalidParameterException':
+            return {
+                'statusCode': 400,
+                'headers': CORS_HEADERS,
+                'body': dumps_json({'error': 'Invalid pageToken'})
+            }
         return {
             'statusCode': 500,
-            'headers': get_cors_headers(),
-            'body': json.dumps({'error': 'Failed to list users'})
+            'headers': CORS_HEADERS,
+            'body': dumps_json({'error': 'Failed to list users'})
+        }
+
+def build_users(cognito_users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Format Cognito users, joined with their groups and subscription data.
+    """
+    # One sweep per group instead of one Cognito call per user
+    user_groups = get_groups_by_user()
+    
+    # Parse each user once; the parsed user_id drives the subscription join
+    users = [
+        parse_user_data(user, user_groups.get(user['Username'], []))
+        for user in cognito_users
+    ]
+    for user in users:
+        if user['user_id']:
+            _users_by_sub[user['user_id']] = (user['username'], user['email'])
+    
+    # Get subscription data from DynamoDB for just these users; the
+    # subscriptions table is keyed by email
+    try:
+        subscriptions = {
+            item['email']: item
+            for item in batch_get_subscriptions([user['email'] for user in users if user['email']])
         }
+        for user in users:
+            subscription = subscriptions.get(user['email'])
+            if subscription:
+                user.update({
+                    'daily_nuggets_subscribed': subscription.get('is_subscribed', False),
+                    'timezone': subscription.get('timezone'),
+                    'preferred_time': subscription.get('preferred_time'),
+                    'subscription_created_at': subscription.get('created_at'),
+                    'subscription_updated_at': subscription.get('updated_at')
+                })
+    except ClientError as e:
+        print(f"Error fetching subscriptions: {e}")
+    
+    return users
+
+def user_create_date(user: Dict[str, Any]) -> datetime:
+    """
+    Sort key for Cognito users; users without a creation date sort last.
+    """
+    return user.get('UserCreateDate') or UNKNOWN_CREATE_DATE
+
+def batch_get_subscriptions(emails: List[str]) -> List[Dict[str, Any]]:
+    """
+    Fetch subscription items for the given emails, 100 keys per BatchGetItem,
+    with the chunks requested concurrently.
+    """
+    # BatchGetItem rejects duplicate keys, and two Cognito users can share an email
+    emails = list(dict.fromkeys(emails))
+    chunks = [emails[i:i + 100] for i in range(0, len(emails), 100)]
+    if not chunks:
+        return []
+    
+    with ThreadPoolExecutor(max_workers=min(len(chunks), SUBSCRIPTION_FETCH_WORKERS)) as executor:
+        return [item for items in executor.map(get_subscription_chunk, chunks) for item in items]
+
+def get_subscription_chunk(emails: List[str]) -> List[Dict[str, Any]]:
+    """
+    Fetch up to 100 subscription items, retrying unprocessed keys with backoff.
+    """
+    items = []
+    request_items = {
+        SUBSCRIPTION_TABLE: {
+            'Keys': [{'email': email} for email in emails],
+            # Only the attributes get_users_list reports
+            'ProjectionExpression': 'email, is_subscribed, #tz, preferred_time, created_at, updated_at',
+            'ExpressionAttributeNames': {'#tz': 'timezone'}
+        }
+    }
+    
+    # Retry unprocessed keys with exponential backoff
+    for attempt in range(4):
+        response = dynamodb.batch_get_item(RequestItems=request_items)
+        items.extend(response['Responses'].get(SUBSCRIPTION_TABLE, []))
+        
+        request_items = response.get('UnprocessedKeys')
+        if not request_items:
+            break
+        time.sleep(0.05 * (2 ** attempt))
+    else:
+        print(f"Warning: {len(request_items[SUBSCRIPTION_TABLE]['Keys'])} subscriptions left unprocessed")
+    
+    return items
 
-def parse_user_data(user: Dict[str, Any], subscriptions: Dict[str, Any]) -> Dict[str, Any]:
+def get_groups_by_user() -> Dict[str, List[str]]:
     """
-    Parse Cognito user data into a clean format.
+    Map each username to its Cognito groups by listing the members of every group.
     """
-    attributes = {attr['Name']: attr['Value'] for attr in user.get('Attributes', [])}
-    user_id = attributes.get('sub')
+    group_names = [
+        group['GroupName']
+        for page in cognito.get_paginator('list_groups').paginate(UserPoolId=USER_POOL_ID)
+        for group in page.get('Groups', [])
+    ]
+    user_groups: Dict[str, List[str]] = {}
+    if not group_names:
+        return user_groups
     
-    # Get subscription data for this user
-    subscription_data = subscriptions.get(user_id, {})
+    # Sweep the groups concurrently; results are merged in group order
+    with ThreadPoolExecutor(max_workers=min(len(group_names), GROUP_SWEEP_WORKERS)) as executor:
+        for group_name, usernames in zip(group_names, executor.map(list_group_members, group_names)):
+            for username in usernames:
+                user_groups.setdefault(username, []).append(group_name)
+    
+    return user_groups
+
+def list_group_members(group_name: str) -> List[str]:
+    """
+    List the usernames in one Cognito group.
+    """
+    pages = cognito.get_paginator('list_users_in_group').paginate(
+        UserPoolId=USER_POOL_ID,
+        GroupName=group_name
+    )
+    return [member['Username'] for page in pages for member in page.get('Users', [])]
+
+def parse_user_data(user: Dict[str, Any], groups: List[str]) -> Dict[str, Any]:
+    """
+    Parse Cognito user data into a clean format. Subscription fields default to
+    unsubscribed and are filled in by the caller's subscription join.
+    """
+    # Pull the needed attributes in one pass, without building an attribute dict
+    user_id = email = name = preferred_username = None
+    email_verified = False
+    for attr in user.get('Attributes', ()):
+        attr_name = attr['Name']
+        if attr_name == 'sub':
+            user_id = attr['Value']
+        elif attr_name == 'email':
+            email = attr['Value']
+        elif attr_name == 'email_verified':
+            email_verified = attr['Value'] == 'true'
+        elif attr_name == 'name':
+            name = attr['Value']
+        elif attr_name == 'preferred_username':
+            preferred_username = attr['Value']
     
     # Parse dates
     created_at = user.get('UserCreateDate')
@@ -168,35 +396,56 @@ def parse_user_data(user: Dict[str, Any], subscriptions: Dict[str, Any]) -> Dict
     if last_modified:
         last_modified = last_modified.isoformat()
     
-    # Get user groups
-    try:
-        groups_response = cognito.admin_list_groups_for_user(
-            UserPoolId=USER_POOL_ID,
-            Username=user['Username']
-        )
-        groups = [group['GroupName'] for group in groups_response.get('Groups', [])]
-    except ClientError:
-        groups = []
-    
     return {
         'user_id': user_id,
         'username': user.get('Username'),
-        'email': attributes.get('email'),
-        'email_verified': attributes.get('email_verified') == 'true',
-        'display_name': attributes.get('name') or attributes.get('preferred_username'),
+        'email': email,
+        'email_verified': email_verified,
+        'display_name': name or preferred_username,
         'status': user.get('UserStatus'),
         'enabled': user.get('Enabled', True),
         'created_at': created_at,
         'last_modified': last_modified,
         'groups': groups,
         'is_admin': 'Admins' in groups,
-        'daily_nuggets_subscribed': subscription_data.get('subscribed', False),
-        'timezone': subscription_data.get('timezone'),
-        'preferred_time': subscription_data.get('preferred_time'),
-        'subscription_created_at': subscription_data.get('created_at'),
-        'subscription_updated_at': subscription_data.get('updated_at')
+        'daily_nuggets_subscribed': False,
+        'timezone': None,
+        'preferred_time': None,
+        'subscription_created_at': None,
+        'subscription_updated_at': None
     }
 
+def find_user_by_sub(user_id: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Look up (Username, email) for a Cognito sub, reusing this container's cache.
+    Returns None when no user has that sub; Cognito errors propagate.
+    """
+    cached = _users_by_sub.get(user_id)
+    if cached:
+        return cached
+    
+    # List users and find the one with matching sub
+    users_response = cognito.list_users(
+        UserPoolId=USER_POOL_ID,
+        Filter=f'sub = "{user_id}"',
+        AttributesToGet=['email'],
+        Limit=1
+    )
+    if not users_response.get('Users'):
+        return None
+    
+    user = users_response['Users'][0]
+    user_email = None
+    
+    # Get email from user attributes
+    for attr in user.get('Attributes', []):
+        if attr['Name'] == 'email':
+            user_email = attr['Value']
+            break
+    
+    _users_by_sub[user_id] = (user['Username'], user_email)
+    return _users_by_sub[user_id]
+
 def update_user_admin_status(user_id: str, body: str, claims: Dict[str, Any]) -> Dict[str, Any]:
     """
     Add or remove a user from the Admins group.
@@ -206,8 +455,8 @@ def update_user_admin_status(user_id: str, body: str, claims: Dict[str, Any]) ->
         if not body:
             return {
                 'statusCode': 400,
-                'headers': get_cors_headers(),
-                'body': json.dumps({'error': 'Request body required'})
+                'headers': CORS_HEADERS,
+                'body': BODY_REQUIRED_BODY
             }
         
         request_data = json.loads(body)
@@ -216,8 +465,8 @@ def update_user_admin_status(user_id: str, body: str, claims: Dict[str, Any]) ->
         if action not in ['add', 'remove']:
             return {
                 'statusCode': 400,
-                'headers': get_cors_headers(),
-                'body': json.dumps({'error': 'Invalid action. Must be "add" or "remove"'})
+                'headers': CORS_HEADERS,
+                'body': dumps_json({'error': 'Invalid action. Must be "add" or "remove"'})
             }
         
         # Get the current user's ID (the one making the request)
@@ -227,34 +476,29 @@ def update_user_admin_status(user_id: str, body: str, claims: Dict[str, Any]) ->
         if action == 'remove' and user_id == current_user_id:
             return {
                 'statusCode': 403,
-                'headers': get_cors_headers(),
-                'body': json.dumps({'error': 'You cannot remove yourself from the Admins group'})
+                'headers': CORS_HEADERS,
+                'body': dumps_json({'error': 'You cannot remove yourself from the Admins group'})
             }
         
         # Find the username for the given user_id
         try:
-            # List users and find the one with matching sub
-            users_response = cognito.list_users(
-                UserPoolId=USER_POOL_ID,
-                Filter=f'sub = "{user_id}"',
-                Limit=1
-            )
+            found_user = find_user_by_sub(user_id)
             
-            if not users_response.get('Users'):
+            if not found_user:
                 return {
                     'statusCode': 404,
-                    'headers': get_cors_headers(),
-                    'body': json.dumps({'error': 'User not found'})
+                    'headers': CORS_HEADERS,
+                    'body': USER_NOT_FOUND_BODY
                 }
             
-            username = users_response['Users'][0]['Username']
+            username = found_user[0]
             
         except ClientError as e:
             print(f"Error finding user: {e}")
             return {
                 'statusCode': 500,
-                'headers': get_cors_headers(),
-                'body': json.dumps({'error': 'Failed to find user'})
+                'headers': CORS_HEADERS,
+                'body': FIND_USER_FAILED_BODY
             }
         
         # Perform the action
@@ -276,8 +520,8 @@ def update_user_admin_status(user_id: str, body: str, claims: Dict[str, Any]) ->
             
             return {
                 'statusCode': 200,
-                'headers': get_cors_headers(),
-                'body': json.dumps({
+                'headers': CORS_HEADERS,
+                'body': dumps_json({
                     'success': True,
                     'message': message,
                     'user_id': user_id,
@@ -289,29 +533,31 @@ def update_user_admin_status(user_id: str, body: str, claims: Dict[str, Any]) ->
             print(f"Error updating user group: {e}")
             error_message = str(e)
             if 'UserNotFoundException' in error_message:
+                # The cached username is stale
+                _users_by_sub.pop(user_id, None)
                 return {
                     'statusCode': 404,
-                    'headers': get_cors_headers(),
-                    'body': json.dumps({'error': 'User not found'})
+                    'headers': CORS_HEADERS,
+                    'body': USER_NOT_FOUND_BODY
                 }
             return {
                 'statusCode': 500,
-                'headers': get_cors_headers(),
-                'body': json.dumps({'error': f'Failed to update user group: {error_message}'})
+                'headers': CORS_HEADERS,
+                'body': dumps_json({'error': f'Failed to update user group: {error_message}'})
             }
             
     except json.JSONDecodeError:
         return {
             'statusCode': 400,
-            'headers': get_cors_headers(),
-            'body': json.dumps({'error': 'Invalid JSON in request body'})
+            'headers': CORS_HEADERS,
+            'body': INVALID_JSON_BODY
         }
     except Exception as e:
         print(f"Unexpected error: {e}")
         return {
             'statusCode': 500,
-            'headers': get_cors_headers(),
-            'body': json.dumps({'error': 'Internal server error'})
+            'headers': CORS_HEADERS,
+            'body': INTERNAL_ERROR_BODY
         }
 
 def delete_user(user_id: str, claims: Dict[str, Any]) -> Dict[str, Any]:
@@ -326,67 +572,48 @@ def delete_user(user_id: str, claims: Dict[str, Any]) -> Dict[str, Any]:
         if user_id == current_user_id:
             return {
                 'statusCode': 403,
-                'headers': get_cors_headers(),
-                'body': json.dumps({'error': 'You cannot delete yourself'})
+                'headers': CORS_HEADERS,
+                'body': dumps_json({'error': 'You cannot delete yourself'})
             }
         
         # Find the username for the given user_id
         try:
-            # List users and find the one with matching sub
-            users_response = cognito.list_users(
-                UserPoolId=USER_POOL_ID,
-                Filter=f'sub = "{user_id}"',
-                Limit=1
-            )
+            found_user = find_user_by_sub(user_id)
             
-            if not users_response.get('Users'):
+            if not found_user:
                 return {
                     'statusCode': 404,
-                    'headers': get_cors_headers(),
-                    'body': json.dumps({'error': 'User not found'})
+                    'headers': CORS_HEADERS,
+                    'body': USER_NOT_FOUND_BODY
                 }
             
-            username = users_response['Users'][0]['Username']
-            user_email = None
-            
-            # Get email from user attributes
-            for attr in users_response['Users'][0].get('Attributes', []):
-                if attr['Name'] == 'email':
-                    user_email = attr['Value']
-                    break
+            username, user_email = found_user
             
         except ClientError as e:
             print(f"Error finding user: {e}")
             return {
                 'statusCode': 500,
-                'headers': get_cors_headers(),
-                'body': json.dumps({'error': 'Failed to find user'})
+                'headers': CORS_HEADERS,
+                'body': FIND_USER_FAILED_BODY
             }
         
-        # Delete the user from Cognito
+        # Delete the user from Cognito, cleaning up subscription data alongside
         try:
-            cognito.admin_delete_user(
-                UserPoolId=USER_POOL_ID,
-                Username=username
-            )
-            
-            # Clean up user data from DynamoDB (subscription data)
-            subscription_table = dynamodb.Table(SUBSCRIPTION_TABLE)
-            try:
-                subscription_table.delete_item(
-                    Key={'user_id': user_id},
-                    ConditionExpression='attribute_exists(user_id)'
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                cognito_delete = executor.submit(
+                    cognito.admin_delete_user,
+                    UserPoolId=USER_POOL_ID,
+                    Username=username
                 )
-                print(f"Deleted subscription data for user {user_id}")
-            except ClientError as e:
-                # It's okay if subscription data doesn't exist
-                if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
-                    print(f"Warning: Could not delete subscription data for user {user_id}: {e}")
+                executor.submit(delete_subscription, user_email)
+                # Join the Cognito delete first so its failure still returns an error
+                cognito_delete.result()
+            _users_by_sub.pop(user_id, None)
             
             return {
                 'statusCode': 200,
-                'headers': get_cors_headers(),
-                'body': json.dumps({
+                'headers': CORS_HEADERS,
+                'body': dumps_json({
                     'success': True,
                     'message': f'User {user_email or username} has been deleted',
                     'user_id': user_id
@@ -397,32 +624,43 @@ def delete_user(user_id: str, claims: Dict[str, Any]) -> Dict[str, Any]:
             print(f"Error deleting user: {e}")
             error_message = str(e)
             if 'UserNotFoundException' in error_message:
+                # The cached username is stale
+                _users_by_sub.pop(user_id, None)
                 return {
                     'statusCode': 404,
-                    'headers': get_cors_headers(),
-                    'body': json.dumps({'error': 'User not found'})
+                    'headers': CORS_HEADERS,
+                    'body': USER_NOT_FOUND_BODY
                 }
             return {
                 'statusCode': 500,
-                'headers': get_cors_headers(),
-                'body': json.dumps({'error': f'Failed to delete user: {error_message}'})
+                'headers': CORS_HEADERS,
+                'body': dumps_json({'error': f'Failed to delete user: {error_message}'})
             }
             
     except Exception as e:
         print(f"Unexpected error: {e}")
         return {
             'statusCode': 500,
-            'headers': get_cors_headers(),
-            'body': json.dumps({'error': 'Internal server error'})
+            'headers': CORS_HEADERS,
+            'body': INTERNAL_ERROR_BODY
         }
 
-def get_cors_headers() -> Dict[str, str]:
+
+def delete_subscription(email: Optional[str]) -> None:
     """
-    Get CORS headers for API responses.
+    Clean up a user's subscription data from DynamoDB, which is keyed by email.
+    Failures are logged only.
     """
-    return {
-        'Content-Type': 'application/json',
-        'Access-Control-Allow-Origin': '*',
-        'Access-Control-Allow-Headers': 'Content-Type,X-Api-Key,Authorization',
-        'Access-Control-Allow-Methods': 'GET,POST,PUT,DELETE,OPTIONS'
-    }
\ No newline at end of file
+    if not email:
+        return
+    
+    try:
+        subscription_table.delete_item(
+            Key={'email': email},
+            ConditionExpression='attribute_exists(email)'
+        )
+        logger.debug("Deleted subscription data for %s", email)
+    except ClientError as e:
+        # It's okay if subscription data doesn't exist
+        if e.response['Error']['Code'] != 'ConditionalCheckFailedException':
+            print(f"Warning: Could not delete subscription data for {email}: {e}")
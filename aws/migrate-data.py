@@ -5,72 +5,87 @@ Migrate data from old DCC tables to new Quote Me tables
 
 import boto3
 import json
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
 
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+# Parallel scan segments; each segment worker also owns its own batch writer
+SCAN_SEGMENTS = 8
+
+# Enough pooled connections for every worker's scan and batch writes
+dynamodb_config = Config(max_pool_connections=SCAN_SEGMENTS * 4)
 
 def decimal_default(obj):
     if isinstance(obj, Decimal):
         return float(obj)
     raise TypeError
 
-def migrate_quotes():
-    """Migrate quotes from dcc-quotes-optimized to quote-me-quotes"""
-    old_table = dynamodb.Table('dcc-quotes-optimized')
-    new_table = dynamodb.Table('quote-me-quotes')
+def copy_segment(old_table_name, new_table_name, segment, should_copy):
+    """Copy one parallel scan segment page by page; returns (scanned, copied)"""
+    # boto3 resources are not thread-safe, so each worker gets its own
+    worker_dynamodb = boto3.session.Session().resource(
+        'dynamodb', region_name='us-east-1', config=dynamodb_config
+    )
+    old_table = worker_dynamodb.Table(old_table_name)
+    new_table = worker_dynamodb.Table(new_table_name)
     
-    print("Migrating quotes...")
-    
-    # Scan old table
-    response = old_table.scan()
-    items = response['Items']
+    scanned = 0
+    copied = 0
+    scan_kwargs = {'Segment': segment, 'TotalSegments': SCAN_SEGMENTS}
+    with new_table.batch_writer() as batch:
+        while True:
+            response = old_table.scan(**scan_kwargs)
+            for item in response['Items']:
+                scanned += 1
+                if should_copy(item):
+                    batch.put_item(Item=item)
+                    copied += 1
+            
+            if 'LastEvaluatedKey' not in response:
+                break
+            scan_kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
     
-    while 'LastEvaluatedKey' in response:
-        response = old_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
-        items.extend(response['Items'])
+    return scanned, copied
+
+def copy_table(old_table_name, new_table_name, should_copy):
+    """Copy items with a parallel scan and concurrent batch writers; returns (scanned, copied)"""
+    with ThreadPoolExecutor(max_workers=SCAN_SEGMENTS) as executor:
+        results = list(executor.map(
+            lambda segment: copy_segment(old_table_name, new_table_name, segment, should_copy),
+            range(SCAN_SEGMENTS)
+        ))
     
-    print(f"Found {len(items)} quotes to migrate")
+    return sum(scanned for scanned, _ in results), sum(copied for _, copied in results)
+
+def is_quote_item(item):
+    """Quotes need id, quote and author; skip any job records that might have been accidentally stored"""
+    if 'job_id' in item or 'status' in item:
+        return False
+    return 'id' in item and 'quote' in item and 'author' in item
+
+def is_tag_item(item):
+    return 'tag' in item
+
+def migrate_quotes():
+    """Migrate quotes from dcc-quotes-optimized to quote-me-quotes"""
+    print("Migrating quotes...")
     
-    # Write to new table in batches
-    with new_table.batch_writer() as batch:
-        for item in items:
-            # Skip any job records that might have been accidentally stored
-            if 'job_id' in item or 'status' in item:
-                continue
-            
-            # Ensure required fields exist
-            if 'id' in item and 'quote' in item and 'author' in item:
-                batch.put_item(Item=item)
+    scanned, copied = copy_table('dcc-quotes-optimized', 'quote-me-quotes', is_quote_item)
     
-    print(f"Migrated {len(items)} quotes successfully")
-    return len(items)
+    print(f"Found {scanned} quotes to migrate")
+    print(f"Migrated {copied} quotes successfully")
+    return copied
 
 def migrate_tags():
     """Migrate tags from dcc-tags to quote-me-tags"""
-    old_table = dynamodb.Table('dcc-tags')
-    new_table = dynamodb.Table('quote-me-tags')
-    
     print("Migrating tags...")
     
     try:
-        # Scan old table
-        response = old_table.scan()
-        items = response['Items']
-        
-        while 'LastEvaluatedKey' in response:
-            response = old_table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
-            items.extend(response['Items'])
-        
-        print(f"Found {len(items)} tags to migrate")
-        
-        # Write to new table in batches
-        with new_table.batch_writer() as batch:
-            for item in items:
-                if 'tag' in item:
-                    batch.put_item(Item=item)
+        scanned, copied = copy_table('dcc-tags', 'quote-me-tags', is_tag_item)
         
-        print(f"Migrated {len(items)} tags successfully")
-        return len(items)
+        print(f"Found {scanned} tags to migrate")
+        print(f"Migrated {copied} tags successfully")
+        return copied
     except Exception as e:
         if "ResourceNotFoundException" in str(e):
             print("Old tags table not found, skipping tag migration")
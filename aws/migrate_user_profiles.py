@@ -6,11 +6,114 @@ Run this once to update the DynamoDB schema for push notification support.
 
 import boto3
 import json
+import threading
+from boto3.dynamodb.conditions import Attr
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, as_completed, wait
 from decimal import Decimal
 from datetime import datetime
 
-# Initialize DynamoDB
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+# Concurrent update_item calls; adaptive retries back off client-side when
+# the table's write capacity throttles them
+UPDATE_WORKERS = 32
+
+# Initialize DynamoDB with a connection pool large enough for the update workers
+dynamodb_config = Config(
+    max_pool_connections=UPDATE_WORKERS * 2,
+    retries={'max_attempts': 10, 'mode': 'adaptive'}
+)
+dynamodb = boto3.resource('dynamodb', region_name='us-east-1', config=dynamodb_config)
+
+# Per-thread resources for the update workers
+_worker_local = threading.local()
+
+# Only the attributes the update reads; fcmTokens and notificationStats are
+# projected so their existence checks still see them
+PROFILE_PROJECTION = 'email, is_subscribed, #tz, fcmTokens, notificationStats'
+
+def scan_all(table, **scan_kwargs):
+    """Yield every matching item page by page, without holding the whole table in memory."""
+    response = table.scan(**scan_kwargs)
+    yield from response['Items']
+    
+    # Handle pagination
+    while 'LastEvaluatedKey' in response:
+        response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'], **scan_kwargs)
+        yield from response['Items']
+
+def build_profile_update(item):
+    """Build the update_item arguments that add the push notification fields."""
+    # Prepare update expression
+    update_expression = "SET "
+    expression_values = {}
+    expression_names = {}
+    
+    # Add FCM tokens structure (empty initially)
+    if 'fcmTokens' not in item:
+        update_expression += "#fcm = :fcm, "
+        expression_names['#fcm'] = 'fcmTokens'
+        expression_values[':fcm'] = {
+            'ios': None,
+            'android': None,
+            'web': None
+        }
+    
+    # Add notification preferences with defaults
+    if 'notificationPreferences' not in item:
+        update_expression += "#prefs = :prefs, "
+        expression_names['#prefs'] = 'notificationPreferences'
+    
+        # Keep email enabled if user has existing subscription
+        enable_email = item.get('is_subscribed', False)
+    
+        expression_values[':prefs'] = {
+            'enableEmail': enable_email,
+            'enablePush': False,  # Opt-in for push
+            'preferredTime': '08:00',  # Default 8 AM
+            'timezone': item.get('timezone', 'America/New_York')  # Use existing or default
+        }
+    
+    # Add notification stats
+    if 'notificationStats' not in item:
+        update_expression += "#stats = :stats"
+        expression_names['#stats'] = 'notificationStats'
+        expression_values[':stats'] = {
+            'lastPushSent': None,
+            'lastOpened': None,
+            'openCount': Decimal(0),
+            'emailOpenCount': Decimal(0),
+            'pushOpenCount': Decimal(0)
+        }
+    
+    # Remove trailing comma and space
+    update_expression = update_expression.rstrip(', ')
+    
+    return {
+        'Key': {'email': item['email']},
+        'UpdateExpression': update_expression,
+        'ExpressionAttributeNames': expression_names,
+        'ExpressionAttributeValues': expression_values
+    }
+    
+def get_worker_table(table_name):
+    """Return this worker thread's own Table, creating it on first use."""
+    # boto3 resources are not thread-safe, so each worker gets its own
+    if getattr(_worker_local, 'dynamodb', None) is None:
+        _worker_local.dynamodb = boto3.session.Session().resource(
+            'dynamodb', region_name='us-east-1', config=dynamodb_config
+        )
+    return _worker_local.dynamodb.Table(table_name)
+
+def migrate_profile(table_name, update_args):
+    """Apply one profile update; returns True on success."""
+    email = update_args['Key']['email']
+    try:
+        get_worker_table(table_name).update_item(**update_args)
+        print(f"✓ Migrated user {email}")
+        return True
+    except Exception as e:
+        print(f"✗ Failed to migrate user {email}: {str(e)}")
+        return False
 
 def migrate_user_profiles():
     """Add push notification fields to existing user profiles."""
@@ -21,91 +124,39 @@ def migrate_user_profiles():
     print(f"Migrating table: {table_name}")
     table = dynamodb.Table(table_name)
     
-    # Scan all existing profiles
-    response = table.scan()
-    items = response['Items']
-    
-    # Handle pagination
-    while 'LastEvaluatedKey' in response:
-        response = table.scan(ExclusiveStartKey=response['LastEvaluatedKey'])
-        items.extend(response['Items'])
-    
-    print(f"Found {len(items)} subscription profiles to migrate")
-    
-    # Update each profile with new fields if they don't exist
+    # Update each profile with new fields if they don't exist, streaming the scan.
+    # Already-migrated profiles are filtered out by DynamoDB, not here
+    scanned_count = 0
     migrated_count = 0
-    for item in items:
-        email = item['email']
-        
-        # Check if already migrated
-        if 'notificationPreferences' in item:
-            print(f"User {email} already migrated, skipping...")
-            continue
-        
-        # Prepare update expression
-        update_expression = "SET "
-        expression_values = {}
-        expression_names = {}
-        
-        # Add FCM tokens structure (empty initially)
-        if 'fcmTokens' not in item:
-            update_expression += "#fcm = :fcm, "
-            expression_names['#fcm'] = 'fcmTokens'
-            expression_values[':fcm'] = {
-                'ios': None,
-                'android': None,
-                'web': None
-            }
-        
-        # Add notification preferences with defaults
-        if 'notificationPreferences' not in item:
-            update_expression += "#prefs = :prefs, "
-            expression_names['#prefs'] = 'notificationPreferences'
+    sample_email = None
+    unmigrated = scan_all(
+        table,
+        FilterExpression=Attr('notificationPreferences').not_exists(),
+        ProjectionExpression=PROFILE_PROJECTION,
+        ExpressionAttributeNames={'#tz': 'timezone'}
+    )
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=UPDATE_WORKERS) as executor:
+        for item in unmigrated:
+            scanned_count += 1
+            if sample_email is None:
+                sample_email = item['email']
             
-            # Keep email enabled if user has existing subscription
-            enable_email = item.get('is_subscribed', False)
+            in_flight.add(executor.submit(migrate_profile, table_name, build_profile_update(item)))
             
-            expression_values[':prefs'] = {
-                'enableEmail': enable_email,
-                'enablePush': False,  # Opt-in for push
-                'preferredTime': '08:00',  # Default 8 AM
-                'timezone': item.get('timezone', 'America/New_York')  # Use existing or default
-            }
-        
-        # Add notification stats
-        if 'notificationStats' not in item:
-            update_expression += "#stats = :stats"
-            expression_names['#stats'] = 'notificationStats'
-            expression_values[':stats'] = {
-                'lastPushSent': None,
-                'lastOpened': None,
-                'openCount': Decimal(0),
-                'emailOpenCount': Decimal(0),
-                'pushOpenCount': Decimal(0)
-            }
-        
-        # Remove trailing comma and space
-        update_expression = update_expression.rstrip(', ')
+            # Bound the queued updates so the scan stays streamed
+            if len(in_flight) >= UPDATE_WORKERS * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                migrated_count += sum(future.result() for future in done)
         
-        try:
-            # Update the item
-            table.update_item(
-                Key={'email': email},
-                UpdateExpression=update_expression,
-                ExpressionAttributeNames=expression_names,
-                ExpressionAttributeValues=expression_values
-            )
-            migrated_count += 1
-            print(f"✓ Migrated user {email}")
-        except Exception as e:
-            print(f"✗ Failed to migrate user {email}: {str(e)}")
+        migrated_count += sum(future.result() for future in as_completed(in_flight))
     
-    print(f"\nMigration complete! Migrated {migrated_count} profiles")
+    print(f"\nMigration complete! Found {scanned_count} unmigrated subscription profiles, migrated {migrated_count}")
     
     # Create a sample migrated profile for testing
     print("\nSample migrated profile structure:")
-    if items:
-        sample = table.get_item(Key={'email': items[0]['email']})['Item']
+    if sample_email:
+        sample = table.get_item(Key={'email': sample_email})['Item']
         print(json.dumps(
             {
                 'email': sample.get('email'),
@@ -5,6 +5,7 @@ Tests old table vs optimized table for various query patterns
 """
 
 import boto3
+from botocore.config import Config
 import time
 import json
 import statistics
@@ -12,8 +13,14 @@ import sys
 from concurrent.futures import ThreadPoolExecutor
 import random
 
-# Initialize DynamoDB
-dynamodb = boto3.resource('dynamodb')
+# Initialize DynamoDB with TCP keep-alive, as the Lambdas do, so timings after
+# the first call measure queries rather than new connections
+dynamodb_config = Config(
+    tcp_keepalive=True,
+    max_pool_connections=10,
+    retries={'mode': 'adaptive'}
+)
+dynamodb = boto3.resource('dynamodb', config=dynamodb_config)
 old_table = dynamodb.Table('dcc-quotes')
 new_table = dynamodb.Table('dcc-quotes-optimized')
 
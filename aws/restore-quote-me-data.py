@@ -7,9 +7,34 @@ import boto3
 import csv
 import uuid
 import sys
+from botocore.config import Config
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-dynamodb = boto3.resource('dynamodb', region_name='us-east-1')
+# Concurrent writers, each with its own batch writer over one shard of the items
+WRITE_WORKERS = 16
+
+dynamodb_config = Config(max_pool_connections=WRITE_WORKERS * 2)
+
+# Tag columns in the export (Tag1 through Tag20), built once rather than per row
+TAG_COLUMNS = [f'Tag{i}' for i in range(1, 21)]
+
+def write_shard(table_name, items):
+    """Write one shard of items with its own resource and batch writer"""
+    # boto3 resources are not thread-safe, so each worker gets its own
+    worker_dynamodb = boto3.session.Session().resource(
+        'dynamodb', region_name='us-east-1', config=dynamodb_config
+    )
+    with worker_dynamodb.Table(table_name).batch_writer() as batch:
+        for item in items:
+            batch.put_item(Item=item)
+
+def write_items(table_name, items):
+    """Write items to the table using WRITE_WORKERS concurrent batch writers"""
+    shards = [items[i::WRITE_WORKERS] for i in range(WRITE_WORKERS)]
+    with ThreadPoolExecutor(max_workers=WRITE_WORKERS) as executor:
+        # list() surfaces any worker's exception
+        list(executor.map(lambda shard: write_shard(table_name, shard), shards))
 
 def restore_quotes_from_csv(csv_filename):
     """Restore quotes from CSV to Quote Me DynamoDB tables"""
@@ -17,59 +42,55 @@ def restore_quotes_from_csv(csv_filename):
     quotes_table_name = 'quote-me-quotes'
     tags_table_name = 'quote-me-tags'
     
-    quotes_table = dynamodb.Table(quotes_table_name)
-    tags_table = dynamodb.Table(tags_table_name)
-    
     print(f"Restoring from: {csv_filename}")
     print(f"Target tables: {quotes_table_name}, {tags_table_name}")
     print("")
     
-    quotes_restored = 0
+    quote_items = []
     all_tags = set()
     
-    # Read and restore quotes
+    # Read the quotes
     with open(csv_filename, 'r', encoding='utf-8') as csvfile:
         reader = csv.DictReader(csvfile)
+        # Only look up the tag columns this export actually has
+        tag_columns = [column for column in TAG_COLUMNS if column in (reader.fieldnames or [])]
         
-        with quotes_table.batch_writer() as batch:
-            for row in reader:
-                quote_text = row['Quote'].strip()
-                author = row['Author'].strip()
-                
-                if not quote_text or not author:
-                    continue
-                
-                # Collect tags (Tag1 through Tag20)
-                tags = []
-                for i in range(1, 21):
-                    tag = row.get(f'Tag{i}', '').strip()
-                    if tag:
-                        tags.append(tag)
-                        all_tags.add(tag)
-                
-                # Create quote item
-                quote_item = {
-                    'id': str(uuid.uuid4()),
-                    'quote': quote_text,
-                    'author': author,
-                    'tags': tags,
-                    'created_at': datetime.utcnow().isoformat()
-                }
-                
-                batch.put_item(Item=quote_item)
-                quotes_restored += 1
-                
-                if quotes_restored % 100 == 0:
-                    print(f"  Processed {quotes_restored} quotes...")
+        for row in reader:
+            quote_text = row['Quote'].strip()
+            author = row['Author'].strip()
+            
+            if not quote_text or not author:
+                continue
+            
+            # Collect tags (Tag1 through Tag20)
+            tags = [tag for tag in (
+                (row.get(column) or '').strip() for column in tag_columns
+            ) if tag]
+            all_tags.update(tags)
+            
+            # Create quote item
+            quote_items.append({
+                'id': str(uuid.uuid4()),
+                'quote': quote_text,
+                'author': author,
+                'tags': tags,
+                'created_at': datetime.utcnow().isoformat()
+            })
+            
+            if len(quote_items) % 100 == 0:
+                print(f"  Read {len(quote_items)} quotes...")
+    
+    # Restore quotes table
+    print(f"Writing {len(quote_items)} quotes with {WRITE_WORKERS} concurrent writers...")
+    write_items(quotes_table_name, quote_items)
+    quotes_restored = len(quote_items)
     
     print(f"✓ Restored {quotes_restored} quotes")
     
     # Restore tags table
     print(f"Restoring {len(all_tags)} unique tags...")
     
-    with tags_table.batch_writer() as batch:
-        for tag in all_tags:
-            batch.put_item(Item={'tag': tag})
+    write_items(tags_table_name, [{'tag': tag} for tag in all_tags])
     
     print(f"✓ Restored {len(all_tags)} tags")
     
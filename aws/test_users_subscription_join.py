@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Offline test for the subscription join in GET /admin/users.
+
+Stubs Cognito and DynamoDB with botocore's Stubber and checks that
+users_handler batch-gets subscriptions with the key schema that
+template-quote-me.yaml actually gives SubscriptionsTable, then maps
+is_subscribed back onto each user.
+
+Usage: python3 test_users_subscription_join.py
+"""
+
+import json
+import os
+import re
+import sys
+from datetime import datetime, timezone
+
+from botocore.stub import Stubber
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE = os.path.join(SCRIPT_DIR, 'template-quote-me.yaml')
+SUBSCRIPTION_TABLE = 'quote-me-subscriptions'
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+os.environ.setdefault('AWS_ACCESS_KEY_ID', 'testing')
+os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'testing')
+os.environ['USER_POOL_ID'] = 'us-east-1_test'
+os.environ['SUBSCRIPTION_TABLE'] = SUBSCRIPTION_TABLE
+sys.path.insert(0, os.path.join(SCRIPT_DIR, 'lambda'))
+
+import users_handler
+
+
+def subscriptions_hash_key():
+    """Read SubscriptionsTable's HASH key attribute from the SAM template"""
+    with open(TEMPLATE) as f:
+        template = f.read()
+    block = re.search(r'\n  SubscriptionsTable:\n(.*?)\n  \S', template, re.DOTALL).group(1)
+    return re.search(r'AttributeName: (\w+)\s*\n\s*KeyType: HASH', block).group(1)
+
+
+def cognito_user(username, sub, email, day):
+    return {
+        'Username': username,
+        'Attributes': [
+            {'Name': 'sub', 'Value': sub},
+            {'Name': 'email', 'Value': email},
+            {'Name': 'email_verified', 'Value': 'true'}
+        ],
+        'UserCreateDate': datetime(2025, 1, day, tzinfo=timezone.utc),
+        'UserStatus': 'CONFIRMED',
+        'Enabled': True
+    }
+
+
+def main():
+    key_name = subscriptions_hash_key()
+    print(f"SubscriptionsTable HASH key from template: {key_name}")
+
+    cognito_stub = Stubber(users_handler.cognito)
+    dynamodb_stub = Stubber(users_handler.dynamodb.meta.client)
+
+    cognito_stub.add_response('list_users', {'Users': [
+        cognito_user('alice', 'sub-a', 'alice@example.com', 2),
+        cognito_user('bob', 'sub-b', 'bob@example.com', 1)
+    ]})
+    cognito_stub.add_response('list_groups', {'Groups': []})
+
+    # Subscription items as daily_nuggets_handler writes them
+    dynamodb_stub.add_response(
+        'batch_get_item',
+        {
+            'Responses': {SUBSCRIPTION_TABLE: [{
+                'email': {'S': 'alice@example.com'},
+                'is_subscribed': {'BOOL': True},
+                'timezone': {'S': 'America/Chicago'}
+            }]},
+            'UnprocessedKeys': {}
+        },
+        {
+            'RequestItems': {SUBSCRIPTION_TABLE: {
+                'Keys': [
+                    {key_name: 'alice@example.com'},
+                    {key_name: 'bob@example.com'}
+                ],
+                'ProjectionExpression': 'email, is_subscribed, #tz, preferred_time, created_at, updated_at',
+                'ExpressionAttributeNames': {'#tz': 'timezone'}
+            }}
+        }
+    )
+
+    event = {
+        'httpMethod': 'GET',
+        'requestContext': {'authorizer': {'claims': {'sub': 'admin', 'cognito:groups': 'Admins'}}}
+    }
+    with cognito_stub, dynamodb_stub:
+        response = users_handler.handler(event, None)
+        dynamodb_stub.assert_no_pending_responses()
+
+    assert response['statusCode'] == 200, response
+    users = {user['email']: user for user in json.loads(response['body'])['users']}
+    assert users['alice@example.com']['daily_nuggets_subscribed'] is True, users
+    assert users['alice@example.com']['timezone'] == 'America/Chicago', users
+    assert users['bob@example.com']['daily_nuggets_subscribed'] is False, users
+
+    print("✓ Subscriptions are batch-fetched by email and joined onto users")
+
+
+if __name__ == '__main__':
+    main()